@@ -0,0 +1,84 @@
+'''
+Usage:
+python3 benchmarks/alloc.py [iterations]
+
+Measures how much memory the interpreter allocates while running a loop-heavy brewin program:
+- the size of a Value and FuncInfo next to the same object with a per-instance __dict__
+- the number of allocations and bytes still alive per loop iteration, via tracemalloc
+- the peak resident set size of the process
+'''
+import os
+import resource
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import interpreterv3 as brewin
+from func import FuncInfo
+
+script = '''
+func add a:int b:int int
+  return + a b
+endfunc
+
+func main void
+  var int i total
+  var string s
+  while < i {iterations}
+    funccall add total i
+    assign total resulti
+    assign s + "x" "y"
+    if == % i 2 0
+      var bool even
+      assign even True
+    endif
+    assign i + i 1
+  endwhile
+  funccall print total
+endfunc
+'''
+
+def instance_size(obj):
+  '''Bytes used by obj itself, including its __dict__ if it has one.'''
+  size = sys.getsizeof(obj)
+  if hasattr(obj, '__dict__'):
+    size += sys.getsizeof(obj.__dict__)
+  return size
+
+def compare_instance_sizes():
+  # subclassing a slotted class without __slots__ gives its instances a __dict__ again
+  DictValue = type('DictValue', (brewin.Value,), {})
+  DictFuncInfo = type('DictFuncInfo', (FuncInfo,), {})
+  pairs = [
+    ('Value', brewin.Value(brewin.Type.INT, 1), DictValue(brewin.Type.INT, 1)),
+    ('FuncInfo', FuncInfo([], 0), DictFuncInfo([], 0)),
+  ]
+  for name, slotted, with_dict in pairs:
+    print(f'{name:10} {instance_size(slotted):4} bytes (with __dict__: {instance_size(with_dict)} bytes)')
+
+def measure_run(iterations):
+  program = script.format(iterations=iterations).split('\n')
+  interpreter = brewin.Interpreter(console_output=False)
+  tracemalloc.start()
+  before = tracemalloc.take_snapshot()
+  interpreter.run(program)
+  after = tracemalloc.take_snapshot()
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  stats = after.compare_to(before, 'filename')
+  blocks = sum(stat.count_diff for stat in stats)
+  size = sum(stat.size_diff for stat in stats)
+  print(f'iterations {iterations}, output {interpreter.get_output()}')
+  print(f'retained blocks per iteration {blocks / iterations:.2f}, bytes per iteration {size / iterations:.1f}')
+  print(f'tracemalloc peak {peak / 1024:.0f} KiB')
+
+def main():
+  iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+  compare_instance_sizes()
+  measure_run(iterations)
+  # ru_maxrss is in KiB on Linux
+  print(f'peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,137 @@
+'''
+Usage:
+python3 benchmarks/run.py [names...] [--repeat N] [--output results.json] [--baseline baseline.json]
+                          [--save-baseline] [--threshold PERCENT]
+
+Runs the brewin programs in this directory (plus a generated large program, `startup`, where
+loading dominates) and reports for each:
+- instructions executed and instructions per second
+- wall time, the best of --repeat runs
+- peak memory allocated while running, via tracemalloc
+Results are written to --output as JSON. If the baseline file exists, each benchmark is compared
+against it and the script exits with status 1 if any got slower by more than --threshold percent.
+--save-baseline writes the results to the baseline file instead.
+'''
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, '..'))
+import interpreterv3 as brewin
+
+def large_program(functions=2000):
+  '''A program with many small functions, only a few of which run, so loading dominates.'''
+  lines = []
+  for i in range(functions):
+    lines += [
+      f'func f{i} a:int b:string int  # generated',
+      '  var int x',
+      '  if > a 1',
+      '    assign x + a 1',
+      '  else',
+      '    funccall print "f # " b',
+      '  endif',
+      '  return x',
+      'endfunc',
+    ]
+  lines += ['func main void', '  funccall f0 5 "s"', '  funccall print resulti', 'endfunc']
+  return lines
+
+def load_benchmarks(names):
+  benchmarks = {}
+  for path in sorted(glob.glob(os.path.join(BENCHMARK_DIR, '*.src'))):
+    with open(path) as f:
+      benchmarks[os.path.splitext(os.path.basename(path))[0]] = f.read().split('\n')
+  benchmarks['startup'] = large_program()
+  if names:
+    unknown = set(names) - benchmarks.keys()
+    if unknown:
+      sys.exit(f'unknown benchmarks: {", ".join(sorted(unknown))}')
+    benchmarks = {name: benchmarks[name] for name in names}
+  return benchmarks
+
+def count_instructions(program):
+  # the profiler counts every line executed; it's too slow to time with, so this is a separate run
+  interpreter = brewin.Interpreter(console_output=False, profile=True)
+  interpreter.run(program)
+  return sum(interpreter.profiler.line_hits)
+
+def measure(program, repeat):
+  times = []
+  for _ in range(repeat):
+    interpreter = brewin.Interpreter(console_output=False)
+    start = time.perf_counter()
+    interpreter.run(program)
+    times.append(time.perf_counter() - start)
+
+  interpreter = brewin.Interpreter(console_output=False)
+  tracemalloc.start()
+  interpreter.run(program)
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  instructions = count_instructions(program)
+  wall_time = min(times)
+  return {
+    'instructions': instructions,
+    'instructions_per_sec': instructions / wall_time,
+    'wall_time': wall_time,
+    'peak_memory': peak,
+  }
+
+def compare(results, baseline, threshold):
+  '''Print each benchmark's change in wall time against the baseline; return the names that regressed.'''
+  regressions = []
+  print()
+  print(f'{"benchmark":12} {"baseline (s)":>13} {"now (s)":>10} {"change":>8}')
+  for name, result in results.items():
+    if name not in baseline:
+      print(f'{name:12} {"-":>13} {result["wall_time"]:>10.4f} {"new":>8}')
+      continue
+    before = baseline[name]['wall_time']
+    change = (result['wall_time'] - before) / before * 100
+    flag = ''
+    if change > threshold:
+      regressions.append(name)
+      flag = '  REGRESSION'
+    print(f'{name:12} {before:>13.4f} {result["wall_time"]:>10.4f} {change:>+7.1f}%{flag}')
+  return regressions
+
+def main():
+  parser = argparse.ArgumentParser(description='Run the brewin benchmark suite.')
+  parser.add_argument('names', nargs='*', help='benchmarks to run (default: all)')
+  parser.add_argument('--repeat', type=int, default=3, help='timed runs per benchmark; the best is kept')
+  parser.add_argument('--output', default=os.path.join(BENCHMARK_DIR, 'results.json'))
+  parser.add_argument('--baseline', default=os.path.join(BENCHMARK_DIR, 'baseline.json'))
+  parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+  parser.add_argument('--threshold', type=float, default=10.0, help='percent slowdown reported as a regression')
+  args = parser.parse_args()
+
+  results = {}
+  print(f'{"benchmark":12} {"instructions":>13} {"instr/s":>12} {"wall (s)":>10} {"peak (KiB)":>11}')
+  for name, program in load_benchmarks(args.names).items():
+    result = results[name] = measure(program, args.repeat)
+    print(f'{name:12} {result["instructions"]:>13} {result["instructions_per_sec"]:>12.0f} '
+          f'{result["wall_time"]:>10.4f} {result["peak_memory"] / 1024:>11.1f}')
+
+  report = {'python': platform.python_version(), 'machine': platform.machine(), 'benchmarks': results}
+  path = args.baseline if args.save_baseline else args.output
+  with open(path, 'w') as f:
+    json.dump(report, f, indent=2)
+  print(f'\nwrote {path}')
+
+  if args.save_baseline or not os.path.exists(args.baseline):
+    return
+  with open(args.baseline) as f:
+    baseline = json.load(f)['benchmarks']
+  if compare(results, baseline, args.threshold):
+    sys.exit(1)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,62 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from frontend import FrontEnd
+
+class ProgramCache:
+  '''
+  An on-disk cache of FrontEnd output (tokens, indents, jump targets and the function table),
+  so running the same program again skips the front end. Entries are files in directory named
+  by a hash of the program's source and VERSION; an entry that can't be read or doesn't match
+  is rebuilt and overwritten.
+  '''
+  VERSION = 2  # bump whenever FrontEnd's output changes shape
+
+  def __init__(self, directory):
+    self.directory = directory
+    os.makedirs(directory, exist_ok=True)
+
+  def digest(program):
+    '''Hash of a program's source; trailing newlines are ignored so readlines() and split() agree.'''
+    h = hashlib.sha256(f'brewin-frontend-{ProgramCache.VERSION}\n'.encode())
+    for line in program:
+      h.update(line.rstrip('\r\n').encode())
+      h.update(b'\n')
+    return h.hexdigest()
+
+  def load(self, program, error):
+    '''Return the FrontEnd for program, from the cache if possible. Syntax errors are never cached.'''
+    digest = ProgramCache.digest(program)
+    path = os.path.join(self.directory, digest + '.pickle')
+    front_end = self._read(path, digest)
+    if front_end is None:
+      front_end = FrontEnd(program, error)
+      self._write(path, digest, front_end)
+    return front_end
+
+  def _read(self, path, digest):
+    try:
+      with open(path, 'rb') as f:
+        version, entry_digest, front_end = pickle.load(f)
+    except Exception:  # missing, truncated or written by an incompatible version
+      return None
+    if version != ProgramCache.VERSION or entry_digest != digest or not isinstance(front_end, FrontEnd):
+      return None
+    return front_end
+
+  def _write(self, path, digest, front_end):
+    # write to a temporary file and rename it, so other processes never see a partial entry
+    try:
+      fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+    except OSError:
+      return  # the cache is only an optimization
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        pickle.dump((ProgramCache.VERSION, digest, front_end), f, pickle.HIGHEST_PROTOCOL)
+      os.replace(tmp_path, path)
+    except OSError:
+      try:
+        os.remove(tmp_path)
+      except OSError:
+        pass
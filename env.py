@@ -1,4 +1,5 @@
 from enum import Enum
+from objects import Member, Object
 
 class SymbolResult(Enum):
   OK = 0     # symbol created, didn't exist in top scope
@@ -20,41 +21,29 @@ class EnvironmentManager:
     self.environment = [[{}]]
 
   def get(self, symbol):
+    if type(symbol) is Member:
+      obj = self.get_object(symbol)
+      if obj is None or type(obj.value()) is not Object:
+        return None
+      return obj.value().get(symbol)
     nested_envs = self.environment[-1]
     for env in reversed(nested_envs):
-      if self.is_member(symbol):
-        obj, mem = symbol.split('.')
-        if obj in env:
-          return env[obj].value()[mem]
-      else:
-        if symbol in env:
-          return env[symbol]
-
+      if symbol in env:
+        return env[symbol]
     return None
 
   def is_variable(self, symbol):
+    if type(symbol) is Member:
+      return self.get(symbol) is not None
     nested_envs = self.environment[-1]
     for env in reversed(nested_envs):
-      if self.is_member(symbol):
-        obj, mem = symbol.split('.')
-        if obj in env and mem in env[obj].value():
-          return True
-      else:
-        if symbol in env:
-          return True
+      if symbol in env:
+        return True
     return False
 
   def get_type(self, symbol):
-    nested_envs = self.environment[-1]
-    for env in reversed(nested_envs):
-      if self.is_member(symbol):
-        obj, mem = symbol.split('.')
-        if obj in env and mem in env[obj].value():
-          return env[obj].value()[mem].type()
-      else:
-        if symbol in env:
-          return env[symbol].type()
-    return None
+    value = self.get(symbol)
+    return None if value is None else value.type()
 
   # create a new symbol in the most nested block's environment; error if
   # the symbol already exists
@@ -66,68 +55,213 @@ class EnvironmentManager:
 
     return SymbolResult.ERROR
 
-  def create_new_member_symbol(self, symbol: str):
+  def is_member(self, symbol):
     '''
-    Given a symbol s thats a member of object o, will update o's dictionary to reflect s.
+    Checks if a symbol is a member of an object (e.g., o.x) whose object exists within scope.
     '''
-    nested_envs = self.environment[-1]
-    object_symbol, member_symbol = symbol.split('.')
-    for env in reversed(nested_envs):
-      if object_symbol in env:
-        env[object_symbol].value()[member_symbol] = None
-        return SymbolResult.OK
-    # Object o in o.s doesn't exist within scope
-    return SymbolResult.ERROR
-
-  def is_member(self, varname: str):
-    '''
-    Checks if a varname is a member of an object by checking if it
-    has the dot notation and if the object exists within scope.
-    '''
-    return len(varname.split('.')) == 2 and self.is_variable(varname.split('.')[0])
+    return type(symbol) is Member and self.is_variable(symbol.object_key)
 
-  def get_members(self, symbol: str):
-    nested_envs = self.environment[-1]
-    members = set()
-    for env in nested_envs: # we aren't reversing because later instances of the same variable are more valid
-      for key in env:
-        if len(key.split('.')) == 2 and key.split('.')[0] == symbol and key not in members:
-          members.add(key)
-    return list(members)
+  # returns the variable a member symbol (e.g., o.x) belongs to, or None
+  def get_object(self, symbol: Member):
+    return self.get(symbol.object_key)
 
   # set works with symbols that were already created
-  # it won't create a new symbol, only update it
+  # it won't create a new symbol, only update it; members are added to their object
   def set(self, symbol, value):
+    if type(symbol) is Member:
+      obj = self.get_object(symbol)
+      if obj is None:
+        return SymbolResult.ERROR
+      obj.value().set(symbol, value)
+      return SymbolResult.OK
     nested_envs = self.environment[-1]
     for env in reversed(nested_envs):
-      if self.is_member(symbol):
-        obj, mem = symbol.split('.')
-        if obj in env:
-          env[obj].value()[mem] = value
-          return SymbolResult.OK
-      else:
-        if symbol in env:
-          env[symbol] = value
-          return SymbolResult.OK
+      if symbol in env:
+        env[symbol] = value
+        return SymbolResult.OK
 
     return SymbolResult.ERROR
 
+  # creates the environment of a function about to be called, for bind() to fill in and
+  # push_frame() to make current once the arguments (evaluated in the caller's) are bound
+  def new_frame(self, frame_size=None):
+    return [{}]
+
   # used only to populate parameters for a function call
   # and populate captured variables; use first for captured, then params
   # so params shadow captured variables
-  def import_mappings(self, dict):
-    cur_env = self.environment[-1][-1]
-    for symbol, value in dict.items():
-      cur_env[symbol] = value
+  def bind(self, frame, symbol, value):
+    frame[0][symbol] = value
 
-  def block_nest(self):
+  # block_size and frame_size are only used by the SlotEnvironmentManager
+  def block_nest(self, block_size=None):
     self.environment[-1].append({})   # [..., [{}]] -> [..., [{}, {}]]
 
   def block_unnest(self):
     self.environment[-1].pop()
 
-  def push(self):
+  # empties the innermost block, so a loop's next iteration can reuse it
+  def block_clear(self):
+    self.environment[-1][-1].clear()
+
+  # the number of blocks in the current function's environment
+  def block_depth(self):
+    return len(self.environment[-1])
+
+  def push(self, frame_size=None):
     self.environment.append([{}])       # [[...],[...]] -> [[...],[...],[]]
 
+  def push_frame(self, frame):
+    self.environment.append(frame)
+
   def pop(self):
     self.environment.pop()
+
+  # drops the environment of the function below the current one, whose call the current one replaced
+  def discard_caller_frame(self):
+    del self.environment[-2]
+
+  # the number of variables in all the live environments
+  def size(self):
+    return sum(len(env) for nested_envs in self.environment for env in nested_envs)
+
+class SlotEnvironmentManager:
+  '''
+  An array-backed EnvironmentManager for lexically addressed programs (see resolver.py).
+  Each function's environment is a list of blocks, and each block is a list of slots, one per
+  variable the Resolver assigned to it. Symbols are the Resolver's keys instead of names:
+  (depth, slot) for a variable and a Member of (depth, slot) for a member of an object, so looking
+  a variable up is an index into the current frame rather than a search of every block.
+  Empty slots hold None; a key of None means the name isn't a variable in scope.
+  Frames come from a FramePool, so calls reuse the frames of calls that returned.
+  '''
+  def __init__(self, frame_size, pool=None):
+    self.pool = pool if pool is not None else FramePool()
+    self.frame = None   # the environment of the function that's executing
+    self.environment = []
+    self.push(frame_size)
+    self.empty_blocks = self.pool.empty_blocks   # block size -> a tuple of that many Nones, to clear blocks with
+
+  def get(self, key):
+    if key is None:
+      return None
+    if type(key) is Member:
+      obj = self.get_object(key)
+      if obj is None or type(obj.value()) is not Object:
+        return None
+      return obj.value().get(key)
+    return self.frame[key[0]][key[1]]
+
+  def is_variable(self, key):
+    return self.get(key) is not None
+
+  def get_type(self, key):
+    value = self.get(key)
+    return None if value is None else value.type()
+
+  # check that the slot is free in the current block; set() then fills it in
+  def create_new_symbol(self, key, create_in_top_block=False):
+    if self.frame[key[0]][key[1]] is None:
+      return SymbolResult.OK
+    return SymbolResult.ERROR
+
+  def is_member(self, key):
+    return type(key) is Member and self.get_object(key) is not None
+
+  def get_object(self, key: Member):
+    object_key = key.object_key
+    return self.frame[object_key[0]][object_key[1]]
+
+  def set(self, key, value):
+    if type(key) is Member:
+      self.get_object(key).value().set(key, value)
+    else:
+      self.frame[key[0]][key[1]] = value
+    return SymbolResult.OK
+
+  def new_frame(self, frame_size):
+    return self.pool.acquire(frame_size)
+
+  def bind(self, frame, key, value):
+    frame[0][key[1]] = value
+
+  def block_nest(self, block_size):
+    self.frame.append([None] * block_size)
+
+  def block_unnest(self):
+    self.frame.pop()
+
+  def block_clear(self):
+    block = self.frame[-1]
+    empty = self.empty_blocks.get(len(block))
+    if empty is None:
+      empty = self.empty_blocks[len(block)] = (None,) * len(block)
+    block[:] = empty
+
+  def block_depth(self):
+    return len(self.frame)
+
+  def push(self, frame_size):
+    self.push_frame(self.pool.acquire(frame_size))
+
+  def push_frame(self, frame):
+    self.frame = frame
+    environment = self.environment
+    environment.append(frame)
+    if len(environment) > self.pool.high_water_mark:
+      self.pool.high_water_mark = len(environment)
+
+  def pop(self):
+    self.pool.release(self.environment.pop())
+    self.frame = self.environment[-1]
+
+  def discard_caller_frame(self):
+    self.pool.release(self.environment.pop(-2))
+
+  # the number of slots in all the live frames, whether or not they're bound yet
+  def size(self):
+    return sum(len(block) for frame in self.environment for block in frame)
+
+class FramePool:
+  '''
+  A free-list of SlotEnvironmentManager frames, so function calls reuse the frames of calls that
+  returned instead of allocating new ones. Free frames are kept by the size of their top block
+  (the function's parameters and locals, see Resolver.frame_sizes), and are emptied when released
+  so they don't keep their variables' values alive.
+  - high_water_mark: the most frames in use at once, i.e. the deepest the call stack got
+  - max_free: the most free frames kept of each size, or None for no limit; after deep recursion
+    returns, up to this many of its frames stay allocated for the next call
+  '''
+  def __init__(self, max_free=None):
+    self.max_free = max_free
+    self.free = {}   # top block size -> (free frames of that size, a tuple of that many Nones to empty them with)
+    self.empty_blocks = {}   # block size -> a tuple of that many Nones, to empty nested blocks with
+    self.high_water_mark = 0   # kept up to date by SlotEnvironmentManager.push_frame
+
+  def acquire(self, frame_size):
+    entry = self.free.get(frame_size)
+    if entry is not None and entry[0]:
+      return entry[0].pop()
+    return [[None] * frame_size]
+
+  def release(self, frame):
+    top_block = frame[0]
+    entry = self.free.get(len(top_block))
+    if entry is None:
+      entry = self.free[len(top_block)] = ([], (None,) * len(top_block))
+    free, empty = entry
+    if self.max_free is not None and len(free) >= self.max_free:
+      return
+    if len(frame) > 1:
+      del frame[1:]   # blocks the function returned from inside of
+    top_block[:] = empty
+    free.append(frame)
+
+  # the number of free frames kept, of every size
+  def size(self):
+    return sum(len(free) for free, _ in self.free.values())
+
+  def __getstate__(self):
+    state = dict(self.__dict__)
+    state['free'] = {}   # free frames are empty, so snapshots leave them out
+    return state
@@ -0,0 +1,91 @@
+from func import FunctionManager, FuncInfo
+from intbase import InterpreterBase, ErrorType
+from tokenizer import Tokenizer
+
+class FrontEnd:
+  '''
+  Loads a program in a single pass over its lines. Each line is tokenized, measured for
+  indentation and matched against the blocks that are open, so by the end of the pass we have:
+  - tokenized_program: the tokens of every line (see Tokenizer)
+  - indents: the indentation of every line
+  - jump_targets: for each line, the line control transfers to: if -> else (or endif),
+    else -> endif, while -> endwhile, endwhile -> while, func -> endfunc and lambda -> endlambda.
+    Lines that aren't part of a block map to None.
+  - func_manager: a FunctionManager with every function's FuncInfo and the return type of each line
+  Mismatched quotes and blocks are reported through error, InterpreterBase.error's signature.
+  '''
+  CLOSERS = {
+    InterpreterBase.ENDFUNC_DEF: InterpreterBase.FUNC_DEF,
+    InterpreterBase.ENDIF_DEF: InterpreterBase.IF_DEF,
+    InterpreterBase.ENDWHILE_DEF: InterpreterBase.WHILE_DEF,
+    InterpreterBase.ENDLAMBDA_DEF: InterpreterBase.LAMBDA_DEF,
+  }
+  MISSING = {opener: 'Missing ' + closer for closer, opener in CLOSERS.items()}
+
+  def __init__(self, program, error):
+    self.tokenized_program = []
+    self.indents = []
+    self.jump_targets = []
+    self.func_manager = FunctionManager()
+    self._load(program, error)
+
+  def _load(self, program, error):
+    tokenized_program = self.tokenized_program
+    indents = self.indents
+    jump_targets = self.jump_targets
+    functions = self.func_manager.func_cache
+    return_types = self.func_manager.return_types
+    closers = FrontEnd.CLOSERS
+    missing = FrontEnd.MISSING
+    stack = []  # (opener keyword, line of opener, line of else if any)
+    return_type_stack = [None]  # return type of the function/lambda each line belongs to
+
+    for line_num, line in enumerate(program):
+      tokens = Tokenizer.tokenize_line(line_num, line, error)
+      tokenized_program.append(tokens)
+      indents.append(len(line) - len(line.lstrip(' ')))
+      jump_targets.append(None)
+      if not tokens:
+        return_types.append(return_type_stack[-1])
+        continue
+
+      keyword = tokens[0]
+      if keyword in missing:
+        stack.append((keyword, line_num, None))
+        if keyword == InterpreterBase.FUNC_DEF:
+          # format:  func funcname p1:t1 p2:t2 p3:t3 ... return_type
+          params = [FunctionManager.to_tuple(formal) for formal in tokens[2:-1]]
+          functions[tokens[1]] = FuncInfo(params, line_num + 1)  # function starts executing on line after funcdef
+          return_type_stack.append(tokens[-1])
+        elif keyword == InterpreterBase.LAMBDA_DEF:
+          return_type_stack.append(tokens[-1])
+        return_types.append(return_type_stack[-1])
+        continue
+
+      return_types.append(return_type_stack[-1])
+      if keyword == InterpreterBase.ELSE_DEF:
+        if not stack or stack[-1][0] != InterpreterBase.IF_DEF or stack[-1][2] is not None:
+          error(ErrorType.SYNTAX_ERROR, "Mismatched else", line_num)
+        if_line = stack.pop()[1]
+        jump_targets[if_line] = line_num
+        stack.append((InterpreterBase.IF_DEF, if_line, line_num))
+      elif keyword in closers:
+        if not stack:
+          if keyword == InterpreterBase.ENDWHILE_DEF:
+            error(ErrorType.SYNTAX_ERROR, "Missing while", line_num)
+          error(ErrorType.SYNTAX_ERROR, f"Mismatched {keyword}", line_num)
+        if stack[-1][0] != closers[keyword]:
+          error(ErrorType.SYNTAX_ERROR, missing[stack[-1][0]], stack[-1][1])
+        opener, opener_line, else_line = stack.pop()
+        if else_line is None:
+          jump_targets[opener_line] = line_num
+        else:
+          jump_targets[else_line] = line_num
+        if keyword == InterpreterBase.ENDWHILE_DEF:
+          jump_targets[line_num] = opener_line
+        elif keyword == InterpreterBase.ENDFUNC_DEF or keyword == InterpreterBase.ENDLAMBDA_DEF:
+          return_type_stack.pop()   # the end line itself still belongs to the function
+
+    if stack:
+      opener, opener_line, _ = stack[-1]
+      error(ErrorType.SYNTAX_ERROR, missing[opener], opener_line)
@@ -1,9 +1,17 @@
+from collections import OrderedDict
 from intbase import InterpreterBase
+from objects import split_member
 
 class FuncInfo:
+  __slots__ = ('params', 'start_ip', 'param_keys', 'frame_size', 'pure', 'code', 'return_type',
+               'captured_variables')
+
   def __init__(self, params, start_ip):
     self.params = params  # format is [[varname1,typename1],[varname2,typename2],...]
     self.start_ip = start_ip    # line number, zero-based
+    self.param_keys = [param[0] for param in params]  # environment symbols the params are bound to
+    self.frame_size = 0         # slots in the top block of the function's frame, for lexical addressing
+    self.pure = False           # whether calls can be memoized, see FunctionManager.find_pure_functions
     # For lambdas only:
     self.code = None
     self.return_type = None
@@ -13,10 +21,12 @@ class FuncInfo:
     self.code = tokenized_function
 
 class FunctionManager:
-  def __init__(self, tokenized_program):
+  PURE_BUILTINS = {InterpreterBase.STRTOINT_DEF}  # built-in functions without side effects
+
+  # FrontEnd fills in func_cache and return_types as it loads the program
+  def __init__(self):
     self.func_cache = {}
     self.return_types = []  # of each line in the program
-    self._cache_function_parameters_and_return_type(tokenized_program)
 
   # Returns a FuncInfo for the named function or lambda
   # which contains a list of params/types and the start IP of the
@@ -39,36 +49,74 @@ class FunctionManager:
   def get_return_type_for_enclosing_function(self, line_num):
     return self.return_types[line_num]
 
-  def _to_tuple(self, formal):
+  # marks the functions whose result depends only on their argument values and that have no side
+  # effects, so calls to them can be memoized
+  def find_pure_functions(self, tokenized_program):
+    value_types = {InterpreterBase.INT_DEF, InterpreterBase.STRING_DEF, InterpreterBase.BOOL_DEF}
+    callees = {}  # name of each candidate function -> names of the functions it calls
+    for func_name, func_info in self.func_cache.items():
+      return_type = self.return_types[func_info.start_ip]
+      if return_type in value_types and all(param[1] in value_types for param in func_info.params):
+        callees[func_name] = self._find_callees_if_pure(tokenized_program, func_info.start_ip)
+    callees = {func_name: names for func_name, names in callees.items() if names is not None}
+
+    # a candidate stays pure only if everything it calls is pure too
+    changed = True
+    while changed:
+      changed = False
+      for func_name in list(callees):
+        if not callees[func_name] <= callees.keys() | FunctionManager.PURE_BUILTINS:
+          del callees[func_name]
+          changed = True
+    for func_name in callees:
+      self.func_cache[func_name].pure = True
+
+  # returns the names of the functions called by the function starting at start_ip, or None if it
+  # does anything impure on its own: creates closures, uses objects or calls a func variable
+  def _find_callees_if_pure(self, tokenized_program, start_ip):
+    callees = set()
+    for tokens in tokenized_program[start_ip:]:
+      if not tokens:
+        continue
+      if tokens[0] == InterpreterBase.ENDFUNC_DEF:
+        return callees
+      if tokens[0] == InterpreterBase.LAMBDA_DEF:
+        return None
+      if any(split_member(token) is not None for token in tokens[1:]):
+        return None
+      if tokens[0] == InterpreterBase.FUNCCALL_DEF and len(tokens) > 1:
+        if tokens[1] not in self.func_cache and tokens[1] not in FunctionManager.PURE_BUILTINS:
+          return None   # print, input, or a func variable we can't see into
+        callees.add(tokens[1])
+    return None
+
+  def to_tuple(formal):
     var_type = formal.split(':')
     return (var_type[0], var_type[1])
 
-  def _cache_function_parameters_and_return_type(self, tokenized_program):
-    cur_return_type = None
-    reset_after_this_line = False
-    return_type_stack = [None]  # v3
-
-    for line_num, line in enumerate(tokenized_program):
-      if line and line[0] == InterpreterBase.FUNC_DEF:
-        # format:  func funcname self.p1:t1 p2:t2 p3:t3 ...
-        func_name = line[1]
-        params = [self._to_tuple(formal) for formal in line[2:-1]]
-        func_info = FuncInfo(params, line_num + 1)  # function starts executing on line after funcdef
-        self.func_cache[func_name] = func_info
-        return_type_stack.append(line[-1])
-
-      if line and line[0] == InterpreterBase.LAMBDA_DEF:
-        # TODO: potentially add parameter stuff for lambda functions here instead of interpreterv3.py
-        return_type_stack.append(line[-1])
-      if line and line[0] == InterpreterBase.ENDLAMBDA_DEF:
-        reset_after_this_line = True
-
-      if line and line[0] == InterpreterBase.ENDFUNC_DEF:
-        reset_after_this_line = True
-
-      self.return_types.append(return_type_stack[-1])  # each line in the program is assigned a return type based on
-                                                 # the function it's associated with; use this to look up valid type
-                                                 # for each return
-      if reset_after_this_line:                  # for each line with a funcend, make sure we know the return type
-        return_type_stack.pop()
-        reset_after_this_line = False
+class MemoCache:
+  '''
+  A bounded LRU cache of the results of calls to pure functions, keyed by the function and the
+  values of its arguments. hits and misses count lookups since the cache was created.
+  '''
+  def __init__(self, maxsize):
+    self.maxsize = maxsize
+    self.results = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+
+  # returns the cached result, or None
+  def get(self, key):
+    result = self.results.get(key)
+    if result is None:
+      self.misses += 1
+      return None
+    self.hits += 1
+    self.results.move_to_end(key)
+    return result
+
+  def put(self, key, result):
+    self.results[key] = result
+    self.results.move_to_end(key)
+    if len(self.results) > self.maxsize:
+      self.results.popitem(last=False)
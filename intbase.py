@@ -1,13 +1,113 @@
 # Base class for our interpreter
+import sys
+from collections import deque
 from enum import Enum
 
 class ErrorType(Enum):
   TYPE_ERROR = 1
   NAME_ERROR = 2    # if a variable or function name can't be found
   SYNTAX_ERROR = 3  # used for syntax errors
+  RESOURCE_ERROR = 4  # if a program exceeds one of the Interpreter's execution budgets
   # Add others here
 
 
+class OutputSink:
+  '''
+  Where a program's output goes. write() is called with each line the program prints; flush()
+  when the program finishes or is about to read input. lines() returns the lines the sink keeps
+  (for get_output), if any.
+  '''
+  def write(self, line):
+    pass
+
+  def flush(self):
+    pass
+
+  def lines(self):
+    return []
+
+  def clear(self):
+    pass
+
+class FileSink(OutputSink):
+  '''Writes lines to a file object (sys.stdout by default), batching up to flush_every lines per write.'''
+  def __init__(self, file=None, flush_every=64):
+    self.file = file  # None means whatever sys.stdout is when we flush, so redirects still work
+    self.flush_every = flush_every
+    self.pending = []
+
+  def write(self, line):
+    self.pending.append(line)
+    if len(self.pending) >= self.flush_every:
+      self.flush()
+
+  def flush(self):
+    if self.pending:
+      file = self.file if self.file is not None else sys.stdout
+      file.write(''.join(f'{line}\n' for line in self.pending))
+      self.pending = []
+      file.flush()
+
+class LogSink(OutputSink):
+  '''Keeps every line, for get_output.'''
+  def __init__(self):
+    self.log = []
+
+  def write(self, line):
+    self.log.append(line)
+
+  def lines(self):
+    return self.log
+
+  def clear(self):
+    self.log = []
+
+class RingBufferSink(OutputSink):
+  '''Keeps only the last maxlen lines.'''
+  def __init__(self, maxlen):
+    self.recent = deque(maxlen=maxlen)
+
+  def write(self, line):
+    self.recent.append(line)
+
+  def lines(self):
+    return list(self.recent)
+
+  def clear(self):
+    self.recent.clear()
+
+class CallbackSink(OutputSink):
+  '''Passes each line to callback as soon as it's printed.'''
+  def __init__(self, callback):
+    self.callback = callback
+
+  def write(self, line):
+    self.callback(line)
+
+class TeeSink(OutputSink):
+  '''Writes every line to each of sinks; get_output comes from the first one that keeps lines.'''
+  def __init__(self, *sinks):
+    self.sinks = sinks
+
+  def write(self, line):
+    for sink in self.sinks:
+      sink.write(line)
+
+  def flush(self):
+    for sink in self.sinks:
+      sink.flush()
+
+  def lines(self):
+    for sink in self.sinks:
+      lines = sink.lines()
+      if lines:
+        return lines
+    return []
+
+  def clear(self):
+    for sink in self.sinks:
+      sink.clear()
+
 class InterpreterBase:
 
   # constants
@@ -45,15 +145,23 @@ class InterpreterBase:
   ENDLAMBDA_DEF = 'endlambda'
 
   # methods
-  def __init__(self, console_output=True, input=None):
+  # output_sink is where printed lines go; by default they're written to the console, or kept for
+  # get_output() if console_output is False. Pass a LogSink (or a TeeSink of one) to keep the full log.
+  def __init__(self, console_output=True, input=None, output_sink=None):
     self.console_output = console_output
-    self.input = input  # if not none, then read input from passed-in list
+    # if not none, then read input from passed-in list, or lazily from any other iterable of lines
+    # (e.g., a generator or an open text file), so large inputs needn't fit in memory
+    self.input = input
+    if output_sink is None:
+      output_sink = FileSink() if console_output else LogSink()
+    self.output_sink = output_sink
     self.reset()
 
   # Call to reset I/O for another run of the program
   def reset(self):
-    self.output_log = []
+    self.output_sink.clear()
     self.input_cursor = 0
+    self.input_lines = None  # iterator over self.input, when it isn't a list
     self.error_type = None
     self.error_line = None
 
@@ -63,8 +171,16 @@ class InterpreterBase:
 
   def get_input(self):
     if not self.input:
+      self.output_sink.flush()  # show any prompt before waiting on the keyboard
       return input()  # Get input from keyboard if not input list provided
 
+    if not isinstance(self.input, (list, tuple)):
+      if self.input_lines is None:
+        self.input_lines = iter(self.input)
+      cur_input = next(self.input_lines, None)
+      self.input_cursor += 1
+      return cur_input.rstrip('\r\n') if cur_input is not None else None  # lines of a file end in a newline
+
     if self.input_cursor < len(self.input):
       cur_input = self.input[self.input_cursor]
       self.input_cursor += 1
@@ -88,12 +204,11 @@ class InterpreterBase:
       raise Exception(f'{error_type} on line {line_num}{description}')
 
   def output(self, v):
-    if self.console_output:
-      print(v)
-    self.output_log.append(v)
+    self.output_sink.write(v)
 
+  # the lines kept by the output sink: all of them by default when console_output is False
   def get_output(self):
-    return self.output_log
+    return self.output_sink.lines()
 
   def get_error_type_and_line(self):
     return self.error_type, self.error_line
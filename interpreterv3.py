@@ -1,9 +1,23 @@
+import asyncio
+import builtins
 import copy
+import itertools
+import operator
+import os
+import sys
+import time
+from cache import ProgramCache
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
-from env import EnvironmentManager, SymbolResult
-from func import FunctionManager, FuncInfo
+from env import EnvironmentManager, FramePool, SlotEnvironmentManager, SymbolResult
+from frontend import FrontEnd
+from func import FuncInfo, MemoCache
 from intbase import InterpreterBase, ErrorType
-from tokenizer import Tokenizer
+from objects import Member, Object, Shape, split_member
+from profiler import Profiler
+from resolver import Resolver
+from snapshot import Snapshot
+from typechecker import TypeChecker
 
 class Type(Enum):
     '''Enumerated type for our different language data types.'''
@@ -16,6 +30,8 @@ class Type(Enum):
 
 class Value:
   '''Represents a value, which has a type and its value.'''
+  __slots__ = ('t', 'v')  # no per-instance __dict__; programs allocate a lot of these
+
   def __init__(self, type: Type, value=None):
     self.t = type
     self.v = value
@@ -30,105 +46,741 @@ class Value:
   def type(self):
     return self.t
 
+  def copy(self):
+    '''Return a new, mutable Value with the same type and value.'''
+    return Value(self.t, self.v)
+
+  def share(self):
+    '''Return a Value with the same type and value to bind to another variable.'''
+    return Value(self.t, self.v)
+
+class Constant(Value):
+  '''
+  An immutable Value. Literals and the results of operations share Constants rather than
+  allocating a new Value on every evaluation, and variables bind them copy-on-write: passing,
+  returning or assigning a Constant shares it, and assigning to a variable bound to a Constant
+  rebinds the variable rather than modifying the Constant (see Interpreter._set_value). A
+  variable passed by reference is first rebound to a mutable copy, which the callee aliases.
+  '''
+  __slots__ = ()
+  def set(self, other):
+    raise Exception('Cannot modify a constant value')
+
+  def share(self):
+    return self
+
+class ConstantPool:
+  '''
+  Maps every literal token of a program (e.g., 17, True, "foo") to a single shared Constant.
+  True/False and small ints are singletons shared by all programs.
+  '''
+  TRUE = Constant(Type.BOOL, True)
+  FALSE = Constant(Type.BOOL, False)
+  BOOLS = (FALSE, TRUE)  # indexed by a python bool
+  SMALL_INT_MIN = -5
+  SMALL_INT_MAX = 256
+  SMALL_INTS = [Constant(Type.INT, i) for i in range(SMALL_INT_MIN, SMALL_INT_MAX + 1)]
+
+  def __init__(self):
+    self.literals = {}  # token -> Constant, or None for tokens that aren't literals
+
+  def get(self, token):
+    '''Return the Constant for a literal token, or None if the token isn't a literal.'''
+    literal = self.literals.get(token, self)  # self doubles as a "not looked up yet" marker
+    if literal is self:
+      literal = self.literals[token] = ConstantPool._parse(token)
+    return literal
+
+  def int_value(n):
+    '''Return a Constant for the int n, sharing the singleton for small ints.'''
+    if ConstantPool.SMALL_INT_MIN <= n <= ConstantPool.SMALL_INT_MAX:
+      return ConstantPool.SMALL_INTS[n - ConstantPool.SMALL_INT_MIN]
+    return Constant(Type.INT, n)
+
+  def _parse(token):
+    if token[0] == '"':
+      return Constant(Type.STRING, token.strip('"'))
+    if token.isdigit() or (token[0] == '-' and token[1:].isdigit()):
+      n = int(token)
+      if ConstantPool.SMALL_INT_MIN <= n <= ConstantPool.SMALL_INT_MAX:
+        return ConstantPool.SMALL_INTS[n - ConstantPool.SMALL_INT_MIN]
+      return Constant(Type.INT, n)
+    if token == InterpreterBase.TRUE_DEF or token == InterpreterBase.FALSE_DEF:
+      return ConstantPool.BOOLS[token == InterpreterBase.TRUE_DEF]
+    return None
+
+class Instruction:
+  '''A line of the program decoded once at load time: its handler, operands and jump target.'''
+  __slots__ = ('handler', 'args', 'keys', 'target', 'expression', 'block_size',
+               'else_block_size', 'function', 'captures', 'tail_return_type', 'tail_passes_result',
+               'reads_input', 'types_checked', 'closes_scope', 'scope_depth')
+
+  def __init__(self, handler, args, keys=None, target=None):
+    self.handler = handler  # bound Interpreter method that executes this line
+    self.args = args        # operand tokens, i.e. the line without its statement keyword
+    self.keys = keys        # environment symbol for each operand token, see Interpreter._resolve_keys
+    self.target = target    # ip to continue at when the line jumps, or None
+    self.expression = None  # compiled expression for assign/if/while/return, see _compile_expression
+    self.block_size = None       # for if/while: slots in the block the line opens, None if it has no scope
+    self.else_block_size = None  # for ifs with an else: slots in the else block, None if it has no scope
+    self.closes_scope = False    # for else/endif/endwhile: whether the block the line ends has a scope
+    self.scope_depth = None      # for whiles: scopes open in the frame outside the loop's body
+    self.function = None    # for lambdas: FuncInfo the closures created by this line are copied from;
+                            # for calls to a named function: its FuncInfo
+    self.captures = None    # for lambdas: [(key in enclosing scope, key in lambda), ...] of its free variables
+    self.tail_return_type = None     # for calls in tail position: return type of the calling function
+    self.tail_passes_result = False  # for tail calls: whether the caller returns the callee's result
+    self.reads_input = False  # whether the line calls the input builtin
+    self.types_checked = False  # for calls: whether the argument types were checked by the TypeChecker
+
 class Interpreter(InterpreterBase):
   '''Main interpreter class.'''
-  def __init__(self, console_output=True, input=None, trace_output=False):
-    super().__init__(console_output, input)
+  BUDGET_CHECK_INTERVAL = 1024  # instructions run between checks of max_instructions and max_environment_size
+
+  def __init__(self, console_output=True, input=None, trace_output=False, lexical_addressing=True,
+               cache_dir=None, memoize=False, memo_size=1024, profile=False, output_sink=None,
+               max_instructions=None, max_call_depth=None, max_environment_size=None, type_check=False,
+               max_free_frames=None):
+    super().__init__(console_output, input, output_sink)
     self._setup_operations()  # setup all valid binary operations and the types they work on
     self._setup_default_values()  # setup the default values for each type (e.g., bool->False)
     self.trace_output = trace_output
+    # resolve variables to slots at load time; False falls back to the dict-based EnvironmentManager,
+    # which looks every variable up by name and is handy for debugging
+    self.lexical_addressing = lexical_addressing
+    # directory to cache loaded programs in, so running the same source again skips the front end
+    self.cache = ProgramCache(cache_dir) if cache_dir is not None else None
+    # cache the results of calls to pure functions, in an LRU cache of up to memo_size calls per run
+    self.memoize = memoize
+    self.memo_size = memo_size
+    self.memo = None  # the MemoCache of the last run, with its hit/miss counts
+    # time every line and function call; see Profiler for the reports
+    self.profile = profile
+    self.profiler = None  # the Profiler of the last run
+    # execution budgets, for running untrusted programs; exceeding one is a RESOURCE_ERROR. None is unlimited.
+    # max_environment_size counts the variable slots of every live frame; it and max_instructions are
+    # checked every BUDGET_CHECK_INTERVAL instructions, so a program may briefly overshoot them
+    self.max_instructions = max_instructions
+    self.max_call_depth = max_call_depth  # calls nested within main, not counting tail calls
+    self.max_environment_size = max_environment_size
+    self.call_depth_limit = max_call_depth if max_call_depth is not None else sys.maxsize
+    self.instruction_count = 0  # instructions run so far, counted only when there's a budget to check
+    # check the program's types before running it (see TypeChecker), failing on the first type error
+    # found, then run it without the checks at run time that the TypeChecker proved will pass
+    self.type_check = type_check
+    self.type_checker = None
+    # with lexical addressing, calls reuse the frames of returned calls, keeping up to max_free_frames
+    # free frames of each size (None is unlimited); see FramePool
+    self.max_free_frames = max_free_frames
+    self.frame_pool = None  # the FramePool of the last run, with its high-water mark
 
   def run(self, program):
     '''Run a program, provided in an array of strings, one string per line of source code.'''
-    self.program = program
-    self._compute_indentation(program)  # determine indentation of every line
-    self.tokenized_program = Tokenizer.tokenize_program(program)
-    self.func_manager = FunctionManager(self.tokenized_program)
+    self._load_program(program)  # tokenize, match blocks and find functions in one pass
+    self._prepare_program()
+    self._execute()
+
+  def run_many(self, program, inputs_list, workers=None):
+    '''
+    Run a program once for each list of input lines in inputs_list, across a pool of up to
+    workers processes (one per CPU by default; 1 runs everything in this process). The program
+    is loaded once, and compiled once per worker. Returns a list with the (output, (error type,
+    error line)) of each run, in the order of inputs_list; output isn't echoed to the console.
+    A run that raises any other exception (e.g. strtoint of input that isn't a number) gets the
+    exception in place of its (error type, error line), and the other runs carry on.
+    '''
+    try:
+      self._load_program(program)
+      if self.type_check:
+        self._check_types()
+    except Exception:
+      if self.error_type is None:
+        raise
+      return [([], self.get_error_type_and_line()) for _ in inputs_list]   # every run would fail the same way
+    options = {'lexical_addressing': self.lexical_addressing, 'memoize': self.memoize,
+               'memo_size': self.memo_size, 'max_instructions': self.max_instructions,
+               'max_call_depth': self.max_call_depth, 'max_environment_size': self.max_environment_size,
+               'type_check': self.type_check, 'max_free_frames': self.max_free_frames}
+    front_end = self.front_end
+
+    if workers == 1:
+      worker = _BatchWorker(program, front_end, options)
+      return [worker.run(inputs) for inputs in inputs_list]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(program, front_end, options)) as executor:
+      chunksize = max(1, len(inputs_list) // ((workers or os.cpu_count() or 1) * 4))
+      return list(executor.map(_run_batch_worker, inputs_list, chunksize=chunksize))
+
+  def check(self, program):
+    '''Return the (line, description) of every type error in a program, without running it.'''
+    self._load_program(program)
+    return self._type_checker().errors
+
+  def _prepare_program(self):
+    '''Compile a loaded program: resolve its variables and decode every line into an Instruction.'''
+    self.constants = ConstantPool()  # filled with the program's literals as we compile it
+    self.type_checker = self._check_types() if self.type_check else None
+    self._resolve_variables()
+    self._compile_program()
+
+  def _type_checker(self):
+    operators = {op: {type_name for type_name, value_type in self.compatible_types.items() if value_type in operations}
+                 for op, operations in self.binary_ops_by_operator.items()}
+    return TypeChecker(self.tokenized_program, self.func_manager, self.type_to_default.keys(), operators,
+                       self.compatible_types)
+
+  # returns the program's TypeChecker, after reporting the first type error it found, if any
+  def _check_types(self):
+    type_checker = self._type_checker()
+    if type_checker.errors:
+      line_num, description = type_checker.errors[0]
+      super().error(ErrorType.TYPE_ERROR, description, line_num)
+    return type_checker
+
+  async def run_async(self, program, input=None, slice_size=1000):
+    '''
+    Run a program as a coroutine that yields to the event loop after every slice_size
+    instructions, so many programs can share one event loop, taking turns fairly. input may be
+    an async iterable of lines, or a function returning an awaitable line, e.g. an asyncio.Queue's
+    get (a None line is the end of input). Otherwise input is read from the Interpreter's input as
+    in run(), with keyboard input read in a thread so it doesn't block the loop. trace_output and
+    profile aren't supported here: setting either raises an exception.
+    '''
+    if self.trace_output or self.profile:
+      raise Exception('run_async does not support trace_output or profile')
+    self._load_program(program)
+    self._prepare_program()
+    self._start_execution()
+    lines = input.__aiter__() if hasattr(input, '__aiter__') else None
+    instructions = self.instructions
+    try:
+      while not self.terminate:
+        count = self._budget_slice(slice_size)
+        for _ in range(count):
+          instruction = instructions[self.ip]
+          if instruction.reads_input:
+            await self._call_input_async(instruction, input, lines)
+          else:
+            instruction.handler(instruction)
+          if self.terminate:
+            break
+        self._check_budgets(count)
+        await asyncio.sleep(0)  # let other tasks run
+    finally:
+      self.output_sink.flush()
+
+  # the input builtin, awaiting the line from input or lines as run_async describes
+  async def _call_input_async(self, instr, input, lines):
+    if instr.args:
+      self._print(instr.args, instr.keys)
+    if lines is not None:
+      try:
+        result = await lines.__anext__()
+      except StopAsyncIteration:
+        result = None
+    elif input is not None:
+      result = await input()
+    elif not self.input:
+      self.output_sink.flush()  # show the prompt before waiting on the keyboard
+      result = await asyncio.get_running_loop().run_in_executor(None, builtins.input)
+    else:
+      result = super().get_input()
+    self._set_result(Constant(Type.STRING, result))
+    self._advance_to_next_statement()
+
+  def snapshot(self):
+    '''
+    Return the execution state of the program being run (its environment, call stack, position and
+    input cursor) as bytes, for restore() to continue it later, in this or another process. Take
+    snapshots between instructions: after an instruction or environment budget error, or while
+    run_async is waiting for its turn. Output already written isn't part of the state.
+    '''
+    state = {
+      'ip': self.ip,
+      'return_stack': self.return_stack,
+      'result_overrides': self.result_overrides,
+      'memo_keys': self.memo_keys,
+      'env_manager': self.env_manager,
+      'terminate': self.terminate,
+      'instruction_count': self.instruction_count,
+      'input_cursor': self.input_cursor,
+    }
+    return Snapshot.dumps(self.program, self.lexical_addressing, state, self._named_functions())
+
+  def restore(self, data):
+    '''
+    Load the program and execution state of a snapshot() into this Interpreter; resume() then
+    continues running it. The Interpreter's own options (budgets, memoize, input) apply, so e.g.
+    input is read from the same position in this Interpreter's input. Memoized results and
+    profiling start over.
+    '''
+    lexical_addressing, program, state = Snapshot.loads(data)
+    if lexical_addressing != self.lexical_addressing:
+      raise Exception(f'Snapshot was taken with lexical_addressing={lexical_addressing}')
+    self.error_type = None
+    self.error_line = None
+    self._load_program(program)
+    self._prepare_program()
+    self._start_execution()
+    state = Snapshot.load_state(state, self._named_functions())
+    self.ip = state['ip']
+    self.return_stack = state['return_stack']
+    self.result_overrides = state['result_overrides']
+    self.memo_keys = state['memo_keys'] if self.memo is not None else [None] * len(state['memo_keys'])
+    self.env_manager = state['env_manager']
+    if self.frame_pool is not None:
+      self.frame_pool = self.env_manager.pool
+      self.frame_pool.max_free = self.max_free_frames
+    self.terminate = state['terminate']
+    self.instruction_count = state['instruction_count']
+    self.profiler = None  # its call stack would start partway through the program's
+    self.input_cursor = state['input_cursor']
+    self.input_lines = None
+    if self.input and not isinstance(self.input, (list, tuple)):
+      self.input_lines = iter(self.input)
+      for _ in itertools.islice(self.input_lines, self.input_cursor):
+        pass  # skip the lines the program already read
+
+  def resume(self):
+    '''Continue running the program from where it stopped, e.g. after restore() or a budget error.'''
+    self.error_type = None
+    self.error_line = None
+    self._run_loop()
+
+  # the FuncInfos that values can share with the program, by name; see Snapshot
+  def _named_functions(self):
+    functions = dict(self.func_manager.func_cache)
+    functions[Snapshot.DEFAULT_FUNC] = self.type_to_default[InterpreterBase.FUNC_DEF].v
+    return functions
+
+  def _execute(self):
+    '''Run a compiled program from the start of main, in a fresh environment.'''
+    self._start_execution()
+    self._run_loop()
+
+  def _run_loop(self):
+    # print(self.env_manager.environment)
+    # print(self.func_manager.func_cache)
+    # main interpreter run loop
+    instructions = self.instructions
+    try:
+      if self.trace_output:
+        self._execute_steps(self._step_traced)
+      elif self.profiler is not None:
+        self._execute_profiled()
+      elif self.max_instructions is not None or self.max_environment_size is not None:
+        self._execute_budgeted(instructions)
+      else:
+        while not self.terminate:
+          instruction = instructions[self.ip]
+          instruction.handler(instruction)
+    finally:
+      self.output_sink.flush()
+
+  def _start_execution(self):
+    '''Set up a fresh environment and call stack to run the compiled program from the start of main.'''
+    self._create_environment()
     self.ip = self.func_manager.get_function_info(InterpreterBase.MAIN_FUNC).start_ip
     self.return_stack = []
+    # parallel to return_stack: the return type whose default replaces the result of each call when
+    # it returns, for calls that took over the frame of a caller that ignores their result; else None
+    self.result_overrides = []
+    self.memo_keys = []  # parallel to return_stack: key to memoize the result of each call under, or None
+    self.memo = MemoCache(self.memo_size) if self.memoize else None
+    self.profiler = Profiler(self.program, self.tokenized_program, self.func_manager) if self.profile else None
     self.terminate = False
-    self.env_manager = EnvironmentManager()   # used to track variables/scope
+    self.instruction_count = 0
 
+  def _execute_budgeted(self, instructions):
+    # run in slices between budget checks, so the loop itself only counts down
+    while not self.terminate:
+      count = self._budget_slice(Interpreter.BUDGET_CHECK_INTERVAL)
+      for _ in itertools.repeat(None, count):
+        instruction = instructions[self.ip]
+        instruction.handler(instruction)
+        if self.terminate:
+          break
+      self._check_budgets(count)
+
+  # returns how many instructions to run before the budgets are next checked, up to count
+  def _budget_slice(self, count):
+    if self.max_instructions is None:
+      return count
+    return min(count, self.max_instructions - self.instruction_count)
+
+  # counts a slice of instructions that ran against the budgets; errors if one is used up
+  def _check_budgets(self, count):
+    self.instruction_count += count
+    if self.terminate:
+      return
+    if self.max_instructions is not None and self.instruction_count >= self.max_instructions:
+      super().error(ErrorType.RESOURCE_ERROR, f"Exceeded the limit of {self.max_instructions} instructions", self.ip)
+    if self.max_environment_size is not None and self.env_manager.size() > self.max_environment_size:
+      super().error(ErrorType.RESOURCE_ERROR,
+                    f"Exceeded the limit of {self.max_environment_size} variables in scope", self.ip)
+
+  # runs step, which runs one instruction, until the program ends, checking the budgets (if any)
+  # between slices like _execute_budgeted
+  def _execute_steps(self, step):
+    if self.max_instructions is None and self.max_environment_size is None:
+      while not self.terminate:
+        step()
+      return
+    while not self.terminate:
+      count = self._budget_slice(Interpreter.BUDGET_CHECK_INTERVAL)
+      for _ in itertools.repeat(None, count):
+        step()
+        if self.terminate:
+          break
+      self._check_budgets(count)
+
+  def _step_traced(self):
+    self.output_sink.flush()  # keep the program's output in order with the trace
+    print(f"{self.ip:04}: {self.program[self.ip].rstrip()}")
+    instruction = self.instructions[self.ip]
+    instruction.handler(instruction)
+
+  def _execute_profiled(self):
+    self.profiler.enter(self.func_manager.get_function_info(InterpreterBase.MAIN_FUNC))
+    try:
+      self._execute_steps(self._step_profiled)
+    finally:
+      self.profiler.finish()
+
+  def _step_profiled(self):
+    ip = self.ip
+    node = self.profiler.node  # the line runs in the caller even if it's a call
+    instruction = self.instructions[ip]
+    start = time.perf_counter()
+    instruction.handler(instruction)
+    self.profiler.record_line(ip, time.perf_counter() - start, node)
+
+  def _resolve_variables(self):
+    '''
+    With lexical addressing, resolve every variable to a slot and give each function its frame
+    layout; otherwise variables are looked up by name in a dict-based EnvironmentManager.
+    '''
+    if not self.lexical_addressing:
+      self.resolver = None
+      self.result_keys = {t: InterpreterBase.RESULT_DEF + suffix for t, suffix in self.type_to_result.items()}
+      self.this_key = InterpreterBase.THIS_DEF
+      return
+
+    self.resolver = Resolver(self.tokenized_program)
+    for func_info in self.func_manager.func_cache.values():
+      func_info.param_keys = self.resolver.param_keys[func_info.start_ip]
+      func_info.frame_size = self.resolver.frame_sizes[func_info.start_ip]
+    self.result_keys = {t: Resolver.result_key(InterpreterBase.RESULT_DEF + suffix)
+                        for t, suffix in self.type_to_result.items()}
+    self.this_key = Resolver.this_key()
+
+  def _create_environment(self):
+    '''Create the environment for main.'''
+    if self.resolver is not None:
+      main_info = self.func_manager.get_function_info(InterpreterBase.MAIN_FUNC)
+      self.frame_pool = FramePool(self.max_free_frames)
+      self.env_manager = SlotEnvironmentManager(main_info.frame_size, self.frame_pool)
+      for func_name, key in self.resolver.function_keys.items():
+        self.env_manager.set(key, Constant(Type.FUNC, self.func_manager.get_function_info(func_name)))
+      return
+    self.frame_pool = None
+
+    self.env_manager = EnvironmentManager()   # used to track variables/scope
     # Set functions as top-level variables
     for func_name in self.func_manager.func_cache:
       self.env_manager.create_new_symbol(func_name, create_in_top_block=True)
       self.env_manager.set(func_name, Value(Type.FUNC, value=func_name))
-    
-    # print(self.env_manager.environment)
-    # print(self.func_manager.func_cache)
-    # main interpreter run loop
-    while not self.terminate:
-      # print()
-      # print(self.env_manager.environment[-1])
-      self._process_line()
-      # if 'resultf' in self.env_manager.environment[-1][-1]:
-      #   print('line:', self.env_manager.environment[-1][0]['resultf'].v.start_ip
-    # print(len(self.env_manager.environment[-1]))
-    # print()
-    # print('func2 start_ip:', self.env_manager.environment[-1][0]['func2'].v.start_ip)
-    for i, return_type in enumerate(self.func_manager.return_types):
-      pass # print(f'line {i + 1}: {return_type}')
-
-  def _process_line(self):
-    if self.trace_output:
-      print(f"{self.ip:04}: {self.program[self.ip].rstrip()}")
-    tokens = self.tokenized_program[self.ip]
-    if not tokens:
-      self._blank_line()
+
+  def _resolve_keys(self, line_num, args):
+    '''
+    Return the environment symbol for each operand token of a line: the token itself for the
+    EnvironmentManager (a Member for o.x), or the Resolver's address (None for non-variables) with
+    lexical addressing.
+    '''
+    if self.resolver is None:
+      return [self._name_key(token) for token in args]
+    keys = self.resolver.keys[line_num]
+    return keys if keys is not None else [None] * len(args)
+
+  def _name_key(self, token):
+    '''Without lexical addressing, a token is its own symbol, except members, which are split once here.'''
+    member = split_member(token)
+    return token if member is None else Member(*member)
+
+  def _compile_program(self):
+    '''
+    Decode every tokenized line into an Instruction once, so executing a line is a single call to
+    its handler instead of a string dispatch on the statement keyword.
+    '''
+    handlers = {
+      InterpreterBase.ASSIGN_DEF: self._assign,
+      InterpreterBase.FUNCCALL_DEF: self._funccall,
+      InterpreterBase.ENDFUNC_DEF: self._endfunc,
+      InterpreterBase.IF_DEF: self._if,
+      InterpreterBase.ELSE_DEF: self._else,
+      InterpreterBase.ENDIF_DEF: self._endif,
+      InterpreterBase.RETURN_DEF: self._return,
+      InterpreterBase.WHILE_DEF: self._while,
+      InterpreterBase.ENDWHILE_DEF: self._endwhile,
+      InterpreterBase.VAR_DEF: self._define_var,
+      InterpreterBase.LAMBDA_DEF: self._lambda,
+      InterpreterBase.ENDLAMBDA_DEF: self._endlambda,
+    }
+    builtins = {
+      InterpreterBase.PRINT_DEF: self._call_print,
+      InterpreterBase.INPUT_DEF: self._call_input,
+      InterpreterBase.STRTOINT_DEF: self._call_strtoint,
+    }
+    # handlers without the type check at run time, for lines whose check the TypeChecker proved passes
+    self.unchecked_handlers = {
+      self._assign: self._assign_unchecked,
+      self._if: self._if_unchecked,
+      self._while: self._while_unchecked,
+      self._return: self._return_unchecked,
+    }
+
+    # blocks that declare no variables get no scope, see Resolver.find_scoped_blocks
+    scoped_blocks = (self.resolver.scoped_blocks if self.resolver is not None
+                     else Resolver.find_scoped_blocks(self.tokenized_program))
+    loop_depths = Resolver.find_loop_depths(self.tokenized_program, scoped_blocks)
+    scope_ends = {self.jump_targets[line_num] for line_num in scoped_blocks}
+
+    self.instructions = []
+    for line_num, tokens in enumerate(self.tokenized_program):
+      if not tokens:
+        self.instructions.append(Instruction(self._blank_line, []))
+        continue
+      if tokens[0] not in handlers:
+        self.instructions.append(Instruction(self._unknown_command, tokens))
+        continue
+
+      handler = handlers[tokens[0]]
+      args = tokens[1:]
+      keys = self._resolve_keys(line_num, args)
+      if tokens[0] == InterpreterBase.FUNCCALL_DEF and args and args[0] in builtins:
+        handler = builtins[args[0]]
+        args = args[1:]
+        keys = keys[1:]
+      types = None
+      if self.type_checker is not None:
+        types = self.type_checker.operand_types[line_num]
+        if self.type_checker.proven[line_num]:
+          handler = self.unchecked_handlers.get(handler, handler)
+      instruction = Instruction(handler, args, keys)
+      if tokens[0] == InterpreterBase.FUNCCALL_DEF:
+        for token in args:
+          self.constants.get(token)  # pool literal arguments now rather than on their first call
+        if handler == self._funccall:
+          self._find_tail_call(line_num, instruction)
+          # function names win over variables in calls, so a call to one always calls that function
+          instruction.function = self.func_manager.get_function_info(args[0]) if args else None
+        instruction.reads_input = handler == self._call_input
+        instruction.types_checked = self.type_checker is not None and self.type_checker.proven[line_num]
+      if tokens[0] == InterpreterBase.ASSIGN_DEF and len(args) >= 2:
+        instruction.expression = self._compile_expression(args[1:], keys[1:], types and types[1:])
+      elif tokens[0] in self.expression_statements and args:
+        instruction.expression = self._compile_expression(args, keys, types)
+      if tokens[0] == InterpreterBase.LAMBDA_DEF:
+        self._compile_lambda(line_num, instruction)
+      if line_num in scoped_blocks:
+        instruction.block_size = self._block_size(line_num)
+      instruction.closes_scope = line_num in scope_ends
+      instruction.scope_depth = loop_depths.get(line_num)
+
+      jump_line = self.jump_targets[line_num]
+      if jump_line is not None:
+        if tokens[0] == InterpreterBase.ENDWHILE_DEF:
+          instruction.target = jump_line       # loop back to re-evaluate the while condition
+        else:
+          instruction.target = jump_line + 1   # continue after the matching else/end line
+        if tokens[0] == InterpreterBase.IF_DEF and jump_line in scoped_blocks:   # an else with a scope
+          instruction.else_block_size = self._block_size(jump_line)
+      if self.resolver is not None:
+        self._fuse(tokens[0], instruction)
+      self.instructions.append(instruction)
+
+  def _find_tail_call(self, line_num, instr):
+    '''
+    A call is in tail position if all its caller does afterwards is return: the lines that follow,
+    skipping blank lines, endifs and else blocks, reach either an endfunc/endlambda or a return of
+    nothing or of the result variable of the caller's return type.
+    '''
+    line_num += 1
+    while line_num < len(self.tokenized_program):
+      tokens = self.tokenized_program[line_num]
+      if not tokens or tokens[0] == InterpreterBase.ENDIF_DEF:
+        line_num += 1
+      elif tokens[0] == InterpreterBase.ELSE_DEF:
+        line_num = self.jump_targets[line_num] + 1   # the else block is skipped, along with its endif
+      elif tokens[0] == InterpreterBase.ENDFUNC_DEF or tokens[0] == InterpreterBase.ENDLAMBDA_DEF:
+        instr.tail_return_type = self.func_manager.get_return_type_for_enclosing_function(line_num)
+        return
+      elif tokens[0] == InterpreterBase.RETURN_DEF:
+        return_type = self.func_manager.get_return_type_for_enclosing_function(line_num)
+        if len(tokens) == 1:
+          instr.tail_return_type = return_type
+        elif return_type in self.compatible_types and len(tokens) == 2 and \
+             tokens[1] == InterpreterBase.RESULT_DEF + self.type_to_result[self.compatible_types[return_type]]:
+          instr.tail_return_type = return_type
+          instr.tail_passes_result = True
+        return
+      else:
+        return
+
+  # comparisons that can be fused with the if/while that branches on them
+  COMPARISONS = {'==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le,
+                 '>': operator.gt, '>=': operator.ge}
+
+  def _fuse(self, keyword, instr):
+    '''
+    With lexical addressing, replace the handler of lines with the commonest shapes in loops with a
+    superinstruction that does the whole line at once:
+    - assign x + x y, assign x - x y: int increment/decrement of a local variable, in place
+    - if/while with a comparison of two locals or literals: compare and branch
+    Operands are checked as the generic handler would, and on anything but the common case (e.g.
+    a type or name error), the superinstruction runs the generic handler, which reports it.
+    '''
+    args = instr.args
+    if keyword == InterpreterBase.ASSIGN_DEF and len(args) == 4 and args[1] in ('+', '-') and \
+       args[2] == args[0] and type(instr.keys[0]) is tuple:
+      self._fuse_increment(instr)
+    elif (keyword == InterpreterBase.IF_DEF or keyword == InterpreterBase.WHILE_DEF) and len(args) == 3 and \
+         args[0] in Interpreter.COMPARISONS:
+      self._fuse_compare_and_branch(keyword, instr)
+
+  # a function returning the Value of a literal or a local variable (None if it's unbound), or None
+  # if the token is neither
+  def _compile_simple_operand(self, token, key):
+    literal = self.constants.get(token)
+    if literal is not None:
+      return lambda: literal
+    if type(key) is not tuple:
+      return None
+    depth, slot = key
+    return lambda: self.env_manager.frame[depth][slot]
+
+  def _fuse_increment(self, instr):
+    step = self._compile_simple_operand(instr.args[3], instr.keys[3])
+    if step is None:
+      return
+    sign = 1 if instr.args[1] == '+' else -1
+    depth, slot = instr.keys[0]
+    generic = instr.handler
+    int_value = ConstantPool.int_value
+
+    def increment(instr):
+      block = self.env_manager.frame[depth]
+      value = block[slot]
+      delta = step()
+      if value is None or delta is None or value.t is not Type.INT or delta.t is not Type.INT:
+        return generic(instr)
+      if type(value) is Constant:
+        block[slot] = int_value(value.v + sign * delta.v)  # copy on write
+      else:
+        value.v += sign * delta.v   # may be aliased by a reference parameter
+      self.ip += 1
+    instr.handler = increment
+
+  # slots in the scope of the block opened on line_num; dictionary scopes don't have a size
+  def _block_size(self, line_num):
+    return self.resolver.block_sizes[line_num] if self.resolver is not None else 0
+
+  def _fuse_compare_and_branch(self, keyword, instr):
+    left = self._compile_simple_operand(instr.args[1], instr.keys[1])
+    right = self._compile_simple_operand(instr.args[2], instr.keys[2])
+    if left is None or right is None:
       return
+    compare = Interpreter.COMPARISONS[instr.args[0]]
+    types = self.binary_ops_by_operator[instr.args[0]]   # the types the comparison works on
+    generic = instr.handler
+
+    def compare_and_branch(instr):
+      a = left()
+      b = right()
+      if a is None or b is None or a.t is not b.t or a.t not in types:
+        return generic(instr)
+      if compare(a.v, b.v):
+        self.ip += 1
+        if instr.block_size is not None:
+          self.env_manager.block_nest(instr.block_size)
+      else:
+        self.ip = instr.target
+        if instr.else_block_size is not None:
+          self.env_manager.block_nest(instr.else_block_size)
+
+    def compare_and_loop(instr):
+      a = left()
+      b = right()
+      if a is None or b is None or a.t is not b.t or a.t not in types:
+        return generic(instr)
+      if compare(a.v, b.v):
+        self.ip += 1
+        if instr.block_size is not None and self.env_manager.block_depth() == instr.scope_depth:
+          self.env_manager.block_nest(instr.block_size)
+      else:
+        self._exit_while(instr)
+    instr.handler = compare_and_loop if keyword == InterpreterBase.WHILE_DEF else compare_and_branch
+
+  def _compile_lambda(self, line_num, instr):
+    params = [tuple(token.split(':')) for token in instr.args[:-1]]
+    instr.function = FuncInfo(params, start_ip=line_num + 1)
+    instr.function.return_type = instr.args[-1]
+    if self.resolver is not None:
+      instr.function.param_keys = self.resolver.param_keys[line_num + 1]
+      instr.function.frame_size = self.resolver.frame_sizes[line_num + 1]
+      instr.captures = self.resolver.captures[line_num]
+    else:
+      instr.captures = [(name, name) for name in self._free_names(line_num)]
 
-    args = tokens[1:]
-
-    match tokens[0]:
-      case InterpreterBase.ASSIGN_DEF:
-        self._assign(args)
-      case InterpreterBase.FUNCCALL_DEF:
-        self._funccall(args)
-      case InterpreterBase.ENDFUNC_DEF:
-        self._endfunc()
-      case InterpreterBase.IF_DEF:
-        self._if(args)
-      case InterpreterBase.ELSE_DEF:
-        self._else()
-      case InterpreterBase.ENDIF_DEF:
-        self._endif()
-      case InterpreterBase.RETURN_DEF:
-        self._return(args)
-      case InterpreterBase.WHILE_DEF:
-        self._while(args)
-      case InterpreterBase.ENDWHILE_DEF:
-        self._endwhile(args)
-      case InterpreterBase.VAR_DEF: # v2 statements
-        self._define_var(args)
-      case InterpreterBase.LAMBDA_DEF:
-        self._lambda(args)
-      case InterpreterBase.ENDLAMBDA_DEF:
-        self._endlambda()
-      case default:
-        raise Exception(f'Unknown command: {tokens[0]}')
-
-  def _blank_line(self):
+  def _free_names(self, line_num):
+    '''
+    Without lexical addressing, return every name used in the body of the lambda on line_num
+    (including the bodies of lambdas nested in it), once each and in order of first use. Those
+    that are variables when the lambda is created get captured. For a member like o.v, this is
+    the object o, so the lambda reads the member's value when it runs.
+    '''
+    names = {}
+    for tokens in self.tokenized_program[line_num + 1:self.jump_targets[line_num]]:
+      if not tokens or tokens[0] == InterpreterBase.LAMBDA_DEF:
+        continue
+      for token in tokens[1:]:
+        member = split_member(token)
+        if member is not None:
+          token = member[0]   # capture the object a member belongs to
+        if not self._is_result(token) and self.constants.get(token) is None:
+          names[token] = None
+    return list(names)
+
+  def _unknown_command(self, instr):
+    raise Exception(f'Unknown command: {instr.args[0]}')
+
+  def _blank_line(self, instr):
     self._advance_to_next_statement()
 
-  def _assign(self, tokens):
+  def _assign(self, instr):
+    tokens = instr.args
     if len(tokens) < 2:
       super().error(ErrorType.SYNTAX_ERROR,"Invalid assignment statement")
     vname = tokens[0]
-    value_type = self._eval_expression(tokens[1:])
-
-    # Check if a member of an object
-    if self._is_member(vname):
-      # Create object in env_manager
-      # print(self.env_manager.environment[-1][0]['o'].v)
-      # quit()=
-      self.env_manager.create_new_member_symbol(vname)
-      self.env_manager.set(vname, value_type)
-
-    existing_value_type = self._get_value(tokens[0])
-    if existing_value_type.type() != value_type.type():
-      super().error(ErrorType.TYPE_ERROR,
-                    f"Trying to assign a variable of {existing_value_type.type()} to a value of {value_type.type()}",
-                    self.ip)
+    vkey = instr.keys[0]
+    value_type = instr.expression()
+
+    # members of an object take on the type of whatever is assigned to them
+    if not self._is_member(vkey):
+      existing_value_type = self._get_value(vname, vkey)
+      if existing_value_type.type() != value_type.type():
+        super().error(ErrorType.TYPE_ERROR,
+                      f"Trying to assign a variable of {existing_value_type.type()} to a value of {value_type.type()}",
+                      self.ip)
+    self._assign_value(instr, value_type)
+
+  def _assign_unchecked(self, instr):
+    self._assign_value(instr, instr.expression())
+
+  def _assign_value(self, instr, value_type):
+    tokens = instr.args
+    vname = tokens[0]
+    vkey = instr.keys[0]
     # If we are assigning a func type variable to another existing variable, the
     # contents of that func variable (function info) must be copied in the func_manager.
     if value_type.type() == Type.FUNC:
@@ -137,225 +789,227 @@ class Interpreter(InterpreterBase):
       # )
       # self.func_manager.func_cache[vname] = self.func_manager.func_cache[tokens[1]]
       if self.func_manager.is_function(tokens[1]):
-        value_type = Value(Type.FUNC, self.func_manager.get_function_info(tokens[1]))
-      elif self.env_manager.is_variable(tokens[1]):
-        value_type = self.env_manager.get(tokens[1])
+        value_type = Constant(Type.FUNC, self.func_manager.get_function_info(tokens[1]))
+      elif self.env_manager.is_variable(instr.keys[1]):
+        value_type = self.env_manager.get(instr.keys[1])
 
-    self._set_value(tokens[0], value_type)
+    self._set_value(vname, vkey, value_type)
     self._advance_to_next_statement()
 
-  def _is_member(self, varname):
+  def _is_member(self, key):
     '''
-    Checks if a varname is a member of an object by checking if it
+    Checks if a variable's key is a member of an object by checking if it
     has the dot notation and if the object exists within scope.
     '''
-    tokens = varname.split('.')
-    if not len(tokens) == 2:
+    if not self.env_manager.is_member(key):
       return False
-    obj, mem = tokens
-    if not self.env_manager.is_variable(obj) or self.env_manager.get(obj).type() != Type.OBJECT:
-      return False
-    return True
+    return self.env_manager.get_object(key).type() == Type.OBJECT
 
-  def _funccall(self, args):
+  def _funccall(self, instr):
+    args = instr.args
     if not args:
       super().error(ErrorType.SYNTAX_ERROR,"Missing function name to call", self.ip)
-    if args[0] == InterpreterBase.PRINT_DEF:
-      self._print(args[1:])
-      self._advance_to_next_statement()
-    elif args[0] == InterpreterBase.INPUT_DEF:
-      self._input(args[1:])
-      self._advance_to_next_statement()
-    elif args[0] == InterpreterBase.STRTOINT_DEF:
-      self._strtoint(args[1:])
-      self._advance_to_next_statement()
+    keys = instr.keys
+    func_info = self._create_new_environment(args[0], keys[0], args[1:], keys[1:],  # Create new environment, copy args into new env
+                                             not instr.types_checked, instr.function)
+    memo_key = None
+    if func_info.pure and self.memo is not None:
+      # the arguments were type checked and bound by _create_new_environment, so key on their values
+      memo_key = (func_info.start_ip, tuple(self.env_manager.get(key).v for key in func_info.param_keys))
+      result = self.memo.get(memo_key)
+      if result is not None:
+        if self.profiler is not None:
+          self.profiler.enter(func_info)
+          self.profiler.leave()
+        self.env_manager.pop()
+        self._set_result(result)
+        self._advance_to_next_statement()
+        return
+    # a tail call has no return_stack entry to memoize its result with, so those are left alone
+    if memo_key is None and instr.tail_return_type is not None and self.return_stack and \
+       self._can_reuse_frame(instr, func_info):
+      # a tail call: the callee returns straight to our caller, so we don't need our frame anymore
+      self.env_manager.discard_caller_frame()
+      if self.profiler is not None:
+        self.profiler.tail_enter(func_info)
+      if not instr.tail_passes_result and self.result_overrides[-1] is None:
+        self.result_overrides[-1] = instr.tail_return_type
     else:
+      if len(self.return_stack) >= self.call_depth_limit:
+        super().error(ErrorType.RESOURCE_ERROR, f"Exceeded the limit of {self.max_call_depth} nested calls", self.ip)
       self.return_stack.append(self.ip+1)
-      self._create_new_environment(args[0], args[1:])  # Create new environment, copy args into new env
-      self.ip = self._find_first_instruction(args[0])
+      self.result_overrides.append(None)
+      self.memo_keys.append(memo_key)
+      if self.profiler is not None:
+        self.profiler.enter(func_info)
+    self.ip = self._find_first_instruction(func_info)
+
+  def _can_reuse_frame(self, instr, func_info):
+    if func_info.start_ip is None:
+      return False  # the default func value returns right away
+    # returning the callee's result ourselves would type check it against our own return type
+    return (not instr.tail_passes_result or
+            self.func_manager.get_return_type_for_enclosing_function(func_info.start_ip) == instr.tail_return_type)
+
+  # built-in functions are resolved when the program is compiled, see _compile_program
+  def _call_print(self, instr):
+    self._print(instr.args, instr.keys)
+    self._advance_to_next_statement()
 
-  def _create_new_environment(self, funcname, args):
-    '''Create a new environment for a function call.'''
-    tmp_mappings = {}
+  def _call_input(self, instr):
+    self._input(instr.args, instr.keys)
+    self._advance_to_next_statement()
+
+  def _call_strtoint(self, instr):
+    self._strtoint(instr.args, instr.keys)
+    self._advance_to_next_statement()
 
-    formal_params = None
-    if self.func_manager.is_function(funcname):
+  def _create_new_environment(self, funcname, funckey, args, arg_keys, check_types=True, func_info=None):
+    '''
+    Create a new environment for a function call, and return the FuncInfo of the function called.
+    func_info is the function's if funcname was already found to be a named function.
+    '''
+    env_func = None
+
+    formal_params = func_info
+    if formal_params is None and self.func_manager.is_function(funcname):
       formal_params = self.func_manager.get_function_info(funcname)
-    elif self.env_manager.is_variable(funcname):
-      if self.env_manager.get_type(funcname) != Type.FUNC:
+    elif formal_params is None and self.env_manager.is_variable(funckey):
+      if self.env_manager.get_type(funckey) != Type.FUNC:
         super().error(ErrorType.TYPE_ERROR, f'{funcname} is not of type `func`')
-      env_func = self.env_manager.get(funcname)
+      env_func = self.env_manager.get(funckey)
       formal_params = env_func.value()
-      tmp_mappings[funcname] = env_func
     if formal_params is None:
         super().error(ErrorType.NAME_ERROR, f"Unknown function name {funcname}", self.ip)
 
     if len(formal_params.params) != len(args):
       super().error(ErrorType.NAME_ERROR,f"Mismatched parameter count in call to {funcname}", self.ip)
 
+    # create a new environment for the target function, and bind our parameters in it
+    # (the arguments are still evaluated in our own environment until it's pushed)
+    frame = self.env_manager.new_frame(formal_params.frame_size)
+    if env_func is not None and self.resolver is None:  # slots are only resolved for the callee's own names
+      self.env_manager.bind(frame, funcname, env_func)
+
     # if function is a method of an object
-    if self._is_member(funcname):
-      # Push member variables/methods (replacing object name with `this`)
-      members = self.env_manager.get_members(funcname.split('.')[0])
-      for member in members:
-        pass # tmp_mappings[InterpreterBase.THIS_DEF + '.' + member.split('.')[1]] = self.env_manager.get(member)
+    if self._is_member(funckey):
       # Push object itself as `this`
-      # tmp_mappings[InterpreterBase.THIS_DEF] = self.env_manager.get(funcname.split('.')[0])
-
-      tmp_mappings[InterpreterBase.THIS_DEF] = self.env_manager.get(funcname.split('.')[0])
+      self.env_manager.bind(frame, self.this_key, self.env_manager.get_object(funckey))
 
     # For lambdas, push captured variables into new environment
     for (var, var_type, var_name) in formal_params.captured_variables:
-      # if self.env_manager.is_variable(var_name):
-      #   tmp_mappings[var_name] = copy.copy(self.env_manager.get(var_name))
-      # else:
-      tmp_mappings[var_name] = var
+      self.env_manager.bind(frame, var_name, var)
     # Push the parameters (after captured variables because parameters
     # will take precedent and will overwrite the captured variables w/ same symbols).
-    for formal, actual in zip(formal_params.params, args):
+    for formal, formal_key, actual, actual_key in zip(formal_params.params, formal_params.param_keys, args, arg_keys):
       formal_name = formal[0]
       formal_typename = formal[1]
-      arg = self._get_value(actual)
-      if arg.type() != self.compatible_types[formal_typename]:
+      arg = self._get_value(actual, actual_key)
+      if check_types and arg.type() != self.compatible_types[formal_typename]:
         super().error(ErrorType.TYPE_ERROR,f"Mismatched parameter type for {formal_name} in call to {funcname}", self.ip)
       if formal_typename in self.reference_types:
-        tmp_mappings[formal_name] = arg
+        if type(arg) is Constant and self.constants.get(actual) is None:
+          # the callee aliases the variable, so it can't share a Constant that assignment would rebind
+          arg = arg.copy()
+          self.env_manager.set(actual_key, arg)
+        self.env_manager.bind(frame, formal_key, arg)   # a literal is only ever rebound by the callee
       else:
-        if arg.type() == Type.FUNC:
-          if self.func_manager.is_function(actual):
-            arg.v = self.func_manager.get_function_info(actual)
-          else:
-            arg.v = self.env_manager.get(actual).v
-        tmp_mappings[formal_name] = copy.copy(arg)
+        if arg.type() == Type.FUNC and self.func_manager.is_function(actual):
+          arg = Constant(Type.FUNC, self.func_manager.get_function_info(actual))  # not the name a dict env binds it to
+        self.env_manager.bind(frame, formal_key, arg.share())
 
-    # create a new environment for the target function
-    # and add our parameters to the env
-    self.env_manager.push()
-    self.env_manager.import_mappings(tmp_mappings)
-    # print(self.env_manager.environment[-1][0]['x'].value())
+    self.env_manager.push_frame(frame)
+    return formal_params
 
-  def _endfunc(self, return_val=None):
+  def _endfunc(self, instr=None, return_val=None):
     if not self.return_stack:  # done with main!
       self.terminate = True
     else:
-      # Find name of this function
-      # print(self.env_manager.environment[-1][0])
-      # print('x' in self.env_manager.environment[-2][0])
-      if InterpreterBase.THIS_DEF in self.env_manager.environment[-1][0]:
-        this_object = self.env_manager.environment[-1][0][InterpreterBase.THIS_DEF]
-        this_name = None
-        for (key, value) in self.env_manager.environment[-2][0].items():
-          if value is this_object:
-            this_name = key
-        for (key, value) in self.env_manager.environment[-1][0].items():
-          if len(key) > len(InterpreterBase.THIS_DEF) and key[:len(InterpreterBase.THIS_DEF)] == InterpreterBase.THIS_DEF:
-            self.env_manager.environment[-2][0][this_name + '.' + key.split('.')[1]] = value
-
       # Get rid of environment for the function
       self.env_manager.pop()  
-      if return_val:
-        self._set_result(return_val)
+      if self.profiler is not None:
+        self.profiler.leave()
+      override = self.result_overrides.pop()
+      result = None
+      if override is not None:
+        # we were tail called by a function that returns its own default rather than our result
+        if override != InterpreterBase.VOID_DEF:
+          result = self.type_to_default[override]
+      elif return_val:
+        result = return_val
       else:
         # return default value for type if no return value is specified. Last param of True enables
         # creation of result variable even if none exists, or is of a different type
         return_type = self.func_manager.get_return_type_for_enclosing_function(self.ip)
         if return_type != InterpreterBase.VOID_DEF:
-          # print('hello:', return_type, self.ip)
-          self._set_result(self.type_to_default[return_type])
+          result = self.type_to_default[return_type]
+      if result is not None:
+        self._set_result(result)
+      memo_key = self.memo_keys.pop()
+      if memo_key is not None:
+        self.memo.put(memo_key, result)
       self.ip = self.return_stack.pop()
 
-  def _lambda(self, args, line_start=None):
+  def _lambda(self, instr):
     # TODO: error handling
-    lambda_func = FuncInfo(params=[], start_ip=self.ip + 1)
-    # Get parameters
-    for token in args[:-1]:
-      var_name, type_name = token.split(':')
-      lambda_func.params.append((var_name, type_name))
-    # Get return type
-    lambda_func.return_type = args[-1]
-
-    # Dictionary of variables that are used in lambda
-    # but are instantiated during the runtime of lambda function.
-    new_vars = set()
-
-    # Count how many layers deep we are with nested lambdas within this one.
-    depth = 0
-
-    if line_start is None:
-      line_start = self.ip
-    
-    for line_num in range(line_start + 1, len(self.tokenized_program)):
-      tokens = self.tokenized_program[line_num]
-      if not tokens:
-        continue
-      if tokens[0] == InterpreterBase.ENDLAMBDA_DEF and self.indents[line_start] == self.indents[line_num]:
-        self.ip = line_num + 1
-        self._set_result(Value(Type.FUNC, lambda_func))
-        # self._set_result(Value(Type.FUNC, lambda_func))
-        return
-      elif tokens[0] == InterpreterBase.LAMBDA_DEF:
-        # self.ip = line_num
-        # print(tokens)
-        # self._lambda(tokens[1:], line_num)
-        pass
-      # elif tokens[0] == InterpreterBase.VAR_DEF:
-      #   for token in tokens[2:]:
-      #     new_vars.add(token)
-      else:
-        # for loop to capture all non-parameter variables that are used
-        for token in tokens:
-          if self.env_manager.is_variable(token) and not self._is_result(token): #  and token not in new_vars:
-            var = self.env_manager.get(token)
-            lambda_func.captured_variables.append((copy.copy(var), var.type(), token))
-
-  def _endlambda(self, return_val=None):
-    self._endfunc(return_val)
+    prototype = instr.function   # parameters etc. were parsed when the program was compiled
+    lambda_func = FuncInfo(prototype.params, prototype.start_ip)
+    lambda_func.param_keys = prototype.param_keys
+    lambda_func.frame_size = prototype.frame_size
+    lambda_func.return_type = prototype.return_type
+
+    # the lambda's free variables were found when the program was compiled, see _compile_lambda
+    for enclosing_key, key in instr.captures:
+      var = self.env_manager.get(enclosing_key)
+      if var is not None:
+        lambda_func.captured_variables.append((var.copy(), var.type(), key))
+
+    self.ip = instr.target
+    self._set_result(Value(Type.FUNC, lambda_func))
+
+  def _endlambda(self, instr):
+    self._endfunc()
     # self._advance_to_next_statement()
 
-  def _if(self, args):
+  def _if(self, instr):
+    args = instr.args
     if not args:
       super().error(ErrorType.SYNTAX_ERROR,"Invalid if syntax", self.ip)
-    value_type = self._eval_expression(args)
+    value_type = instr.expression()
     if value_type.type() != Type.BOOL:
       super().error(ErrorType.TYPE_ERROR,"Non-boolean if expression", self.ip)
+    self._branch(instr, value_type)
+
+  def _if_unchecked(self, instr):
+    self._branch(instr, instr.expression())
+
+  def _branch(self, instr, value_type):
     if value_type.value():
       self._advance_to_next_statement()
-      self.env_manager.block_nest()  # we're in a nested block, so create new env for it
+      if instr.block_size is not None:
+        self.env_manager.block_nest(instr.block_size)  # we're in a nested block, so create new env for it
       return
-    else:
-      for line_num in range(self.ip+1, len(self.tokenized_program)):
-        tokens = self.tokenized_program[line_num]
-        if not tokens:
-          continue
-        if tokens[0] == InterpreterBase.ENDIF_DEF and self.indents[self.ip] == self.indents[line_num]:
-          self.ip = line_num + 1
-          return
-        if tokens[0] == InterpreterBase.ELSE_DEF and self.indents[self.ip] == self.indents[line_num]:
-          self.ip = line_num + 1
-          self.env_manager.block_nest()  # we're in a nested else block, so create new env for it
-          return
-    super().error(ErrorType.SYNTAX_ERROR,"Missing endif", self.ip)
-
-  def _endif(self):
+    # jump to the line after our else (or endif, if there is no else)
+    self.ip = instr.target
+    if instr.else_block_size is not None:
+      self.env_manager.block_nest(instr.else_block_size)  # we're in a nested else block, so create new env for it
+
+  def _endif(self, instr):
     self._advance_to_next_statement()
-    self.env_manager.block_unnest()
+    if instr.closes_scope:
+      self.env_manager.block_unnest()
 
-  def _else(self):
+  def _else(self, instr):
     '''
     We would only run this if we ran the successful if block, and fell into the else at the end of the block
     so we need to delete the old top environment.
     '''
-    self.env_manager.block_unnest()   # Get rid of env for block above
-    for line_num in range(self.ip+1, len(self.tokenized_program)):
-      tokens = self.tokenized_program[line_num]
-      if not tokens:
-        continue
-      if tokens[0] == InterpreterBase.ENDIF_DEF and self.indents[self.ip] == self.indents[line_num]:
-          self.ip = line_num + 1
-          return
-    super().error(ErrorType.SYNTAX_ERROR,"Missing endif", self.ip)
+    if instr.closes_scope:
+      self.env_manager.block_unnest()   # Get rid of env for block above
+    self.ip = instr.target
 
-  def _return(self,args):
+  def _return(self, instr):
+    args = instr.args
     # do we want to support returns without values?
     return_type = self.func_manager.get_return_type_for_enclosing_function(self.ip)
     default_value_type = self.type_to_default[return_type]
@@ -369,92 +1023,86 @@ class Interpreter(InterpreterBase):
       return
 
     #otherwise evaluate the expression and return its value
-    value_type = self._eval_expression(args)
+    value_type = instr.expression()
     if value_type.type() != default_value_type.type():
       super().error(ErrorType.TYPE_ERROR,"Non-matching return type", self.ip)
-    self._endfunc(value_type)
+    self._endfunc(return_val=value_type)
+
+  def _return_unchecked(self, instr):
+    self._endfunc(return_val=instr.expression())
 
-  def _while(self, args):
+  def _while(self, instr):
+    args = instr.args
     if not args:
       super().error(ErrorType.SYNTAX_ERROR,"Missing while expression", self.ip)
-    value_type = self._eval_expression(args)
+    value_type = instr.expression()
     if value_type.type() != Type.BOOL:
       super().error(ErrorType.TYPE_ERROR,"Non-boolean while expression", self.ip)
+    self._loop(instr, value_type)
+
+  def _while_unchecked(self, instr):
+    self._loop(instr, instr.expression())
+
+  def _loop(self, instr, value_type):
     if value_type.value() == False:
-      self._exit_while()
+      self._exit_while(instr)
       return
 
     # If true, we advance to the next statement
     self._advance_to_next_statement()
-    # And create a new scope
-    self.env_manager.block_nest()
-
-  def _exit_while(self):
-    while_indent = self.indents[self.ip]
-    cur_line = self.ip + 1
-    while cur_line < len(self.tokenized_program):
-      if self.tokenized_program[cur_line][0] == InterpreterBase.ENDWHILE_DEF and self.indents[cur_line] == while_indent:
-        self.ip = cur_line + 1
-        return
-      if self.tokenized_program[cur_line] and self.indents[cur_line] < self.indents[self.ip]:
-        break # syntax error!
-      cur_line += 1
-    # didn't find endwhile
-    super().error(ErrorType.SYNTAX_ERROR,"Missing endwhile", self.ip)
-
-  def _endwhile(self, args):
-    # first delete the scope
-    self.env_manager.block_unnest()
-    while_indent = self.indents[self.ip]
-    cur_line = self.ip - 1
-    while cur_line >= 0:
-      if self.tokenized_program[cur_line][0] == InterpreterBase.WHILE_DEF and self.indents[cur_line] == while_indent:
-        self.ip = cur_line
-        return
-      if self.tokenized_program[cur_line] and self.indents[cur_line] < self.indents[self.ip]:
-        break # syntax error!
-      cur_line -= 1
-    # didn't find while
-    super().error(ErrorType.SYNTAX_ERROR,"Missing while", self.ip)
-
-
-  def _define_var(self, args):
+    # And create a new scope, on the first iteration only: endwhile clears it for the next one
+    if instr.block_size is not None and self.env_manager.block_depth() == instr.scope_depth:
+      self.env_manager.block_nest(instr.block_size)
+
+  def _exit_while(self, instr):
+    if instr.block_size is not None and self.env_manager.block_depth() > instr.scope_depth:
+      self.env_manager.block_unnest()   # the scope the last iteration left open
+    self.ip = instr.target
+
+  def _endwhile(self, instr):
+    # first empty the scope, which the next iteration reuses
+    if instr.closes_scope:
+      self.env_manager.block_clear()
+    self.ip = instr.target
+
+  def _define_var(self, instr):
+    args = instr.args
     if len(args) < 2:
       super().error(ErrorType.SYNTAX_ERROR,"Invalid var definition syntax", self.ip)
-    for var_name in args[1:]:
-      if self.env_manager.create_new_symbol(var_name) != SymbolResult.OK:
+    for var_name, var_key in zip(args[1:], instr.keys[1:]):
+      if self.env_manager.create_new_symbol(var_key) != SymbolResult.OK:
         super().error(ErrorType.NAME_ERROR,f"Redefinition of variable {args[1]}", self.ip)
       # is the type a valid type?
       if args[0] not in self.type_to_default:
         super().error(ErrorType.TYPE_ERROR,f"Invalid type {args[0]}", self.ip)
-      # Create the variable with a copy of the default value for the type
+      # Create the variable with the default value for the type; objects are mutable, so get a copy
       val = self.type_to_default[args[0]]
-      self.env_manager.set(var_name, Value(copy.copy(val.t), copy.copy(val.v)))
+      self.env_manager.set(var_key, val.share() if val.t != Type.OBJECT else Value(val.t, copy.copy(val.v)))
 
     self._advance_to_next_statement()
 
-  def _print(self, args):
+  def _print(self, args, keys):
     if not args:
       super().error(ErrorType.SYNTAX_ERROR,"Invalid print call syntax", self.ip)
     out = []
-    for arg in args:
-      val_type = self._get_value(arg)
+    for arg, key in zip(args, keys):
+      val_type = self._get_value(arg, key)
       out.append(str(val_type.value()))
     super().output(''.join(out))
 
-  def _input(self, args):
+  def _input(self, args, keys):
     if args:
-      self._print(args)
+      self._print(args, keys)
     result = super().get_input()
-    self._set_result(Value(Type.STRING, result))   # return always passed back in result
+    self._set_result(Constant(Type.STRING, result))   # return always passed back in result
 
-  def _strtoint(self, args):
+  def _strtoint(self, args, keys):
     if len(args) != 1:
       super().error(ErrorType.SYNTAX_ERROR,"Invalid strtoint call syntax", self.ip)
-    value_type = self._get_value(args[0])
+    value_type = self._get_value(args[0], keys[0])
     if value_type.type() != Type.STRING:
       super().error(ErrorType.TYPE_ERROR,"Non-string passed to strtoint", self.ip)
-    self._set_result(Value(Type.INT, int(value_type.value())))   # return always passed back in result
+    self._set_result(Constant(Type.INT, int(value_type.value())))   # return always passed back in result
 
   def _advance_to_next_statement(self):
     # for now just increment IP, but later deal with loops, returns, end of functions, etc.
@@ -464,12 +1112,14 @@ class Interpreter(InterpreterBase):
   def _setup_default_values(self):
     # set up what value to return as the default value for each type
     self.type_to_default = {}
-    self.type_to_default[InterpreterBase.INT_DEF] = Value(Type.INT, 0)
-    self.type_to_default[InterpreterBase.STRING_DEF] = Value(Type.STRING, '')
-    self.type_to_default[InterpreterBase.BOOL_DEF] = Value(Type.BOOL, False)
-    self.type_to_default[InterpreterBase.VOID_DEF] = Value(Type.VOID, None)
-    self.type_to_default[InterpreterBase.FUNC_DEF] = Value(Type.FUNC, FuncInfo([], start_ip=None))
-    self.type_to_default[InterpreterBase.OBJECT_DEF] = Value(Type.OBJECT, {}) # TODO: object default value?
+    self.type_to_default[InterpreterBase.INT_DEF] = Constant(Type.INT, 0)
+    self.type_to_default[InterpreterBase.STRING_DEF] = Constant(Type.STRING, '')
+    self.type_to_default[InterpreterBase.BOOL_DEF] = Constant(Type.BOOL, False)
+    self.type_to_default[InterpreterBase.VOID_DEF] = Constant(Type.VOID, None)
+    default_func = FuncInfo([], start_ip=None)
+    default_func.frame_size = Resolver.FIRST_FREE_SLOT  # room for result variables and this
+    self.type_to_default[InterpreterBase.FUNC_DEF] = Constant(Type.FUNC, default_func)
+    self.type_to_default[InterpreterBase.OBJECT_DEF] = Value(Type.OBJECT, Object(Shape()))  # objects of a program share a tree of Shapes
 
     # set up what types are compatible with what other types
     self.compatible_types = {}
@@ -501,134 +1151,251 @@ class Interpreter(InterpreterBase):
   # run a program, provided in an array of strings, one string per line of source code
   def _setup_operations(self):
     self.binary_op_list = ['+','-','*','/','%','==','!=', '<', '<=', '>', '>=', '&', '|']
+    self.short_circuit_ops = {'&': False, '|': True}  # operator -> left operand value that decides the result
+    self.expression_statements = {InterpreterBase.IF_DEF, InterpreterBase.WHILE_DEF, InterpreterBase.RETURN_DEF}
     self.binary_ops = {}
+    # results come from the constant pool where possible, so comparisons and small ints don't allocate
+    int_value = ConstantPool.int_value
+    bools = ConstantPool.BOOLS
     self.binary_ops[Type.INT] = {
-     '+': lambda a,b: Value(Type.INT, a.value()+b.value()),
-     '-': lambda a,b: Value(Type.INT, a.value()-b.value()),
-     '*': lambda a,b: Value(Type.INT, a.value()*b.value()),
-     '/': lambda a,b: Value(Type.INT, a.value()//b.value()),  # // for integer ops
-     '%': lambda a,b: Value(Type.INT, a.value()%b.value()),
-     '==': lambda a,b: Value(Type.BOOL, a.value()==b.value()),
-     '!=': lambda a,b: Value(Type.BOOL, a.value()!=b.value()),
-     '>': lambda a,b: Value(Type.BOOL, a.value()>b.value()),
-     '<': lambda a,b: Value(Type.BOOL, a.value()<b.value()),
-     '>=': lambda a,b: Value(Type.BOOL, a.value()>=b.value()),
-     '<=': lambda a,b: Value(Type.BOOL, a.value()<=b.value()),
+     '+': lambda a,b: int_value(a.value()+b.value()),
+     '-': lambda a,b: int_value(a.value()-b.value()),
+     '*': lambda a,b: int_value(a.value()*b.value()),
+     '/': lambda a,b: int_value(a.value()//b.value()),  # // for integer ops
+     '%': lambda a,b: int_value(a.value()%b.value()),
+     '==': lambda a,b: bools[a.value()==b.value()],
+     '!=': lambda a,b: bools[a.value()!=b.value()],
+     '>': lambda a,b: bools[a.value()>b.value()],
+     '<': lambda a,b: bools[a.value()<b.value()],
+     '>=': lambda a,b: bools[a.value()>=b.value()],
+     '<=': lambda a,b: bools[a.value()<=b.value()],
     }
     self.binary_ops[Type.STRING] = {
-     '+': lambda a,b: Value(Type.STRING, a.value()+b.value()),
-     '==': lambda a,b: Value(Type.BOOL, a.value()==b.value()),
-     '!=': lambda a,b: Value(Type.BOOL, a.value()!=b.value()),
-     '>': lambda a,b: Value(Type.BOOL, a.value()>b.value()),
-     '<': lambda a,b: Value(Type.BOOL, a.value()<b.value()),
-     '>=': lambda a,b: Value(Type.BOOL, a.value()>=b.value()),
-     '<=': lambda a,b: Value(Type.BOOL, a.value()<=b.value()),
+     '+': lambda a,b: Constant(Type.STRING, a.value()+b.value()),
+     '==': lambda a,b: bools[a.value()==b.value()],
+     '!=': lambda a,b: bools[a.value()!=b.value()],
+     '>': lambda a,b: bools[a.value()>b.value()],
+     '<': lambda a,b: bools[a.value()<b.value()],
+     '>=': lambda a,b: bools[a.value()>=b.value()],
+     '<=': lambda a,b: bools[a.value()<=b.value()],
     }
     self.binary_ops[Type.BOOL] = {
-     '&': lambda a,b: Value(Type.BOOL, a.value() and b.value()),
-     '==': lambda a,b: Value(Type.BOOL, a.value()==b.value()),
-     '!=': lambda a,b: Value(Type.BOOL, a.value()!=b.value()),
-     '|': lambda a,b: Value(Type.BOOL, a.value() or b.value())
+     '&': lambda a,b: bools[a.value() and b.value()],
+     '==': lambda a,b: bools[a.value()==b.value()],
+     '!=': lambda a,b: bools[a.value()!=b.value()],
+     '|': lambda a,b: bools[a.value() or b.value()]
     }
 
-  def _compute_indentation(self, program):
-    self.indents = [len(line) - len(line.lstrip(' ')) for line in program]
-
-  def _find_first_instruction(self, funcname):
-    func_info = None
-    if self.func_manager.is_function(funcname):
-      func_info = self.func_manager.get_function_info(funcname)
-    elif self.env_manager.is_variable(funcname):
-      func_info = self.env_manager.get(funcname).value()
-    else:
-      pass
-      # print(f'func_info: {func_info}, funcname: {funcname}')
-      # print(self.env_manager.environment)
-    # func_info = self.func_manager.get_function_info(funcname)
-    if not func_info:
-      super().error(ErrorType.NAME_ERROR,f"Unable to locate {funcname} function")
+    # the same table indexed the other way around, operator -> type -> operation, for compiled expressions
+    self.binary_ops_by_operator = {op: {} for op in self.binary_op_list}
+    for value_type, operations in self.binary_ops.items():
+      for op, operation in operations.items():
+        self.binary_ops_by_operator[op][value_type] = operation
 
+  def _load_program(self, program, front_end=None):
+    self.program = program
+    if front_end is None and self.cache is not None:
+      front_end = self.cache.load(program, self.error)
+    elif front_end is None:
+      front_end = FrontEnd(program, self.error)
+    self.front_end = front_end
+    self.tokenized_program = front_end.tokenized_program
+    self.indents = front_end.indents
+    self.jump_targets = front_end.jump_targets
+    self.func_manager = front_end.func_manager
+    if self.memoize:
+      self.func_manager.find_pure_functions(self.tokenized_program)
+
+  def _find_first_instruction(self, func_info):
+    # the function was looked up in the caller's environment by _create_new_environment
     if func_info.start_ip == None:
       self._endfunc()
       return self.ip
 
     return func_info.start_ip
 
-  def _get_value(self, token):
+  def _get_value(self, token, key):
     '''
-    Given a token name (e.g., x, 17, True, "foo"), give us a Value object associated
-    with it.
+    Given a token name (e.g., x, 17, True, "foo") and its environment key, give us a Value
+    object associated with it.
     '''
     if not token:
       super().error(ErrorType.NAME_ERROR,f"Empty token", self.ip)
-    if token[0] == '"':
-      return Value(Type.STRING, token.strip('"'))
-    if token.isdigit() or token[0] == '-':
-      return Value(Type.INT, int(token))
-    if token == InterpreterBase.TRUE_DEF or token == Interpreter.FALSE_DEF:
-      return Value(Type.BOOL, token == InterpreterBase.TRUE_DEF)
+    literal = self.constants.get(token)
+    if literal is not None:
+      return literal
+    return self._get_variable(token, key)
 
+  def _get_variable(self, token, key):
+    '''Give us the Value object for a (non-literal) variable or function name token.'''
     # type error for when a non-object type is called with dot notation
-    if len(token.split('.')) == 2:
-      obj, mem = token.split('.')
-      if self.env_manager.is_variable(obj) and self.env_manager.get(obj).type() != Type.OBJECT:
-        super().error(ErrorType.TYPE_ERROR, f'Dot operator used on a non-object variable `{token.split(".")[0]}`', self.ip)
-    
+    if self.env_manager.is_member(key) and self.env_manager.get_object(key).type() != Type.OBJECT:
+      super().error(ErrorType.TYPE_ERROR, f'Dot operator used on a non-object variable `{token.split(".")[0]}`', self.ip)
+
     # look in environments for variable
-    if self.env_manager.is_variable(token):
-      return self.env_manager.get(token)
+    if self.env_manager.is_variable(key):
+      return self.env_manager.get(key)
 
     # look in func manager for variable
     if self.func_manager.is_function(token):
-      return Value(Type.FUNC, self.func_manager.get_function_info(token))
+      return Constant(Type.FUNC, self.func_manager.get_function_info(token))
 
     # not found
     super().error(ErrorType.NAME_ERROR,f"Unknown variable {token}", self.ip)
 
-  # given a variable name and a Value object, associate the name with the value
-  def _set_value(self, varname: str, to_value_type: Value):
-    if self._is_member(varname):
-      # If a member variable of an object
-      self.env_manager.create_new_member_symbol(varname)
-      self.env_manager.set(varname, to_value_type)
-    
-    value_type = self.env_manager.get(varname)
+  # given a variable name, its environment key and a Value object, associate the name with the value
+  def _set_value(self, varname: str, key, to_value_type: Value):
+    if self._is_member(key):
+      # If a member variable of an object, (re)bind it to its own Value
+      self.env_manager.set(key, to_value_type.share())
+      return
+
+    value_type = self.env_manager.get(key)
     if value_type == None:
       super().error(ErrorType.NAME_ERROR,f"Assignment of unknown variable {varname}", self.ip)
-    value_type.set(to_value_type)
+    if type(value_type) is Constant:
+      self.env_manager.set(key, to_value_type.share())  # copy on write
+    else:
+      value_type.set(to_value_type)  # may be aliased by a reference parameter
 
   # bind the result[s,i,b] variable in the calling function's scope to the proper Value object
   def _set_result(self, value_type):
     # always stores result in the highest-level block scope for a function, so nested if/while blocks
     # don't each have their own version of result
-    result_var = InterpreterBase.RESULT_DEF + self.type_to_result[value_type.type()]
-    self.env_manager.create_new_symbol(result_var, True)  # create in top block if it doesn't exist
-    self.env_manager.set(result_var, copy.copy(value_type))
+    result_key = self.result_keys[value_type.type()]
+    self.env_manager.create_new_symbol(result_key, True)  # create in top block if it doesn't exist
+    self.env_manager.set(result_key, value_type.share())
 
-  def _eval_expression(self, tokens):
-    '''Evaluate expressions in prefix notation: + 5 * 6 x.'''
+  def _compile_expression(self, tokens, keys, types=None):
+    '''
+    Compile a prefix expression (e.g., + 5 * 6 x) into a closure that evaluates it. Operators and
+    literals are classified once here, so re-evaluating the expression in a loop only does the
+    arithmetic and the variable lookups. types are the TypeChecker's operand types for the tokens,
+    if it ran; operators whose operand types it knows are compiled without type checks.
+    '''
     stack = []
-
-    for token in reversed(tokens):
-      if token in self.binary_op_list:
-        v1 = stack.pop()
-        v2 = stack.pop()
-        if v1.type() != v2.type():
-          super().error(ErrorType.TYPE_ERROR,f"Mismatching types {v1.type()} and {v2.type()}", self.ip)
-        operations = self.binary_ops[v1.type()]
-        if token not in operations:
-          super().error(ErrorType.TYPE_ERROR,f"Operator {token} is not compatible with {v1.type()}", self.ip)
-        stack.append(operations[token](v1,v2))
+    types = reversed(types) if types is not None else [None] * len(tokens)
+    for token, key, operand_type in zip(reversed(tokens), reversed(keys), types):
+      if token in self.binary_ops_by_operator:
+        if len(stack) < 2:
+          return self._compile_invalid_expression()
+        left = stack.pop()
+        right = stack.pop()
+        if operand_type is not None:
+          stack.append(self._compile_unchecked_binary_op(token, left, right, self.compatible_types[operand_type]))
+        else:
+          stack.append(self._compile_binary_op(token, left, right))
       elif token == '!':
-        v1 = stack.pop()
-        if v1.type() != Type.BOOL:
-          super().error(ErrorType.TYPE_ERROR,f"Expecting boolean for ! {v1.type()}", self.ip)
-        stack.append(Value(Type.BOOL, not v1.value()))
+        if not stack:
+          return self._compile_invalid_expression()
+        if operand_type is not None:
+          stack.append(self._compile_unchecked_not(stack.pop()))
+        else:
+          stack.append(self._compile_not(stack.pop()))
       else:
-        value_type = self._get_value(token)
-        stack.append(value_type)
+        stack.append(self._compile_operand(token, key))
 
     if len(stack) != 1:
-      super().error(ErrorType.SYNTAX_ERROR,f"Invalid expression", self.ip)
-
+      return self._compile_invalid_expression()
     return stack[0]
+
+  def _compile_operand(self, token, key):
+    literal = self.constants.get(token)
+    if literal is not None:
+      return lambda: literal
+    if self.resolver is None or key is None:
+      return lambda: self._get_variable(token, key)
+    if type(key) is Member:
+      return self._compile_member_operand(token, key)
+
+    # a local variable: load its slot directly, falling back to _get_variable to report errors
+    depth, slot = key
+    def load():
+      value = self.env_manager.frame[depth][slot]
+      return value if value is not None else self._get_variable(token, key)
+    return load
+
+  def _compile_member_operand(self, token, key):
+    # a member of a local object: index the object through the Member's cached shape
+    depth, slot = key.object_key
+    def load():
+      obj = self.env_manager.frame[depth][slot]
+      if obj is not None and type(obj.v) is Object:
+        value = obj.v.get(key)
+        if value is not None:
+          return value
+      return self._get_variable(token, key)
+    return load
+
+  def _compile_binary_op(self, op, left, right):
+    operations = self.binary_ops_by_operator[op]  # type of operands -> operation
+    short_circuit_value = self.short_circuit_ops.get(op)
+
+    def evaluate():
+      v1 = left()
+      if short_circuit_value is not None and v1.t == Type.BOOL and v1.v == short_circuit_value:
+        return ConstantPool.BOOLS[short_circuit_value]
+      v2 = right()
+      if v1.t != v2.t:
+        self.error(ErrorType.TYPE_ERROR,f"Mismatching types {v1.type()} and {v2.type()}", self.ip)
+      if v1.t not in operations:
+        self.error(ErrorType.TYPE_ERROR,f"Operator {op} is not compatible with {v1.type()}", self.ip)
+      return operations[v1.t](v1, v2)
+    return evaluate
+
+  def _compile_unchecked_binary_op(self, op, left, right, operand_type):
+    operation = self.binary_ops_by_operator[op][operand_type]
+    short_circuit_value = self.short_circuit_ops.get(op)
+    if short_circuit_value is None:
+      return lambda: operation(left(), right())
+
+    def evaluate():
+      v1 = left()
+      if v1.v == short_circuit_value:
+        return ConstantPool.BOOLS[short_circuit_value]
+      return operation(v1, right())
+    return evaluate
+
+  def _compile_not(self, operand):
+    def evaluate():
+      v1 = operand()
+      if v1.t != Type.BOOL:
+        self.error(ErrorType.TYPE_ERROR,f"Expecting boolean for ! {v1.type()}", self.ip)
+      return ConstantPool.BOOLS[not v1.v]
+    return evaluate
+
+  def _compile_unchecked_not(self, operand):
+    return lambda: ConstantPool.BOOLS[not operand().v]
+
+  def _compile_invalid_expression(self):
+    def evaluate():
+      self.error(ErrorType.SYNTAX_ERROR,f"Invalid expression", self.ip)
+    return evaluate
+
+class _BatchWorker:
+  '''Runs one compiled program over and over with different input, for Interpreter.run_many.'''
+  def __init__(self, program, front_end, options):
+    self.interpreter = Interpreter(console_output=False, **options)
+    self.interpreter._load_program(program, front_end)
+    self.interpreter._prepare_program()
+
+  def run(self, inputs):
+    interpreter = self.interpreter
+    interpreter.reset()
+    interpreter.input = iter(inputs)   # never the keyboard, even when inputs is empty: reads past the end get None
+    try:
+      interpreter._execute()
+    except Exception as exception:
+      if interpreter.error_type is None:
+        # e.g. strtoint of a missing or non-numeric input line; only this run fails
+        return interpreter.get_output(), exception
+    return interpreter.get_output(), interpreter.get_error_type_and_line()
+
+_batch_worker = None  # the _BatchWorker of a run_many worker process
+
+def _init_batch_worker(program, front_end, options):
+  global _batch_worker
+  _batch_worker = _BatchWorker(program, front_end, options)
+
+def _run_batch_worker(inputs):
+  return _batch_worker.run(inputs)
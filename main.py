@@ -3,6 +3,8 @@ Usage:
 This script will run the brewin interpreter on a provided brewin script
 - With no argument provided, the brewin script used will be the variable `script`
 - Providing a path to a brewin script file that will be used instead
+- Optionally followed by a directory to cache the loaded script in, so later runs of the same
+  script skip tokenizing it
 '''
 import interpreterv3 as brewin
 import sys
@@ -28,7 +30,8 @@ endfunc
 '''
 
 def main():
-    interpreter = brewin.Interpreter(trace_output=False)
+    cache_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    interpreter = brewin.Interpreter(trace_output=False, cache_dir=cache_dir)
     
     if len(sys.argv) == 1:
         interpreter.run(script.split('\n'))
@@ -0,0 +1,75 @@
+class Shape:
+  '''
+  The layout of an object (a "hidden class"): the index in the object's values of each of its
+  members. Objects that gain the same members in the same order share a Shape, so the index
+  a member was found at can be cached by the Member symbol used to access it.
+  '''
+  __slots__ = ('indices', 'transitions')
+
+  def __init__(self, indices=None):
+    self.indices = indices if indices is not None else {}  # member name -> index in values
+    self.transitions = {}  # member name -> the Shape an object moves to when it gains that member
+
+  def add(self, member):
+    shape = self.transitions.get(member)
+    if shape is None:
+      indices = dict(self.indices)
+      indices[member] = len(indices)
+      shape = self.transitions[member] = Shape(indices)
+    return shape
+
+def split_member(token):
+  '''Return (object name, member name) if token is a member symbol like o.x, else None.'''
+  if not (token[0].isalpha() or token[0] == '_'):
+    return None   # literals and operators
+  parts = token.split('.')
+  return (parts[0], parts[1]) if len(parts) == 2 else None
+
+class Member:
+  '''
+  A member symbol (e.g., o.x) split into its object's symbol and the member name once, when the
+  program is loaded. It remembers the last Shape it was found in, so accessing the member of
+  objects with that shape is a single list index.
+  '''
+  __slots__ = ('object_key', 'name', 'shape', 'index')
+
+  def __init__(self, object_key, name):
+    self.object_key = object_key  # environment symbol of the object
+    self.name = name
+    self.shape = None
+    self.index = None
+
+class Object:
+  '''The value of an object variable: its Shape and the Values of its members, in shape order.'''
+  __slots__ = ('shape', 'values')
+
+  def __init__(self, shape):
+    self.shape = shape
+    self.values = []
+
+  def __copy__(self):
+    obj = Object(self.shape)
+    obj.values = list(self.values)
+    return obj
+
+  # returns the Value of the member, or None if the object doesn't have it
+  def get(self, member: Member):
+    if self.shape is not member.shape:
+      index = self.shape.indices.get(member.name)
+      if index is None:
+        return None
+      member.shape = self.shape
+      member.index = index
+    return self.values[member.index]
+
+  # binds the member to value, adding the member to the object if it doesn't have it yet
+  def set(self, member: Member, value):
+    if self.shape is not member.shape:
+      index = self.shape.indices.get(member.name)
+      if index is None:
+        self.shape = self.shape.add(member.name)
+        index = len(self.values)
+        self.values.append(None)
+      member.shape = self.shape
+      member.index = index
+    self.values[member.index] = value
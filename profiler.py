@@ -0,0 +1,185 @@
+import marshal
+from func import FunctionManager
+from intbase import InterpreterBase
+
+class Profiler:
+  '''
+  Collects where a program spends its time when the Interpreter is created with profile=True:
+  - for each source line: how many times it ran and the time spent executing it
+  - for each function or lambda: its calls, self time (spent on its own lines) and total time
+    (spent while it's on the stack, so including the functions it calls; recursive calls
+    aren't counted twice, like cProfile)
+  - for each call stack: the self time spent with that stack, for flamegraphs
+  Lambdas are named like FunctionManager.create_lambda_name, e.g. lambda:12 for a lambda on line 12.
+
+  Call stacks are kept as nodes of a tree, so entering a function is O(1) however deep the
+  stack is: node 0 is the empty stack, and every other node is a function called from its parent.
+  '''
+  DEFAULT_FUNC_NAME = '<default func>'  # the default value of a func variable, which does nothing
+
+  def __init__(self, program, tokenized_program, func_manager, filename='<brewin>'):
+    self.program = program
+    self.filename = filename
+    self.function_names = {}  # start_ip -> name, for named functions
+    for func_name, func_info in func_manager.func_cache.items():
+      self.function_names[func_info.start_ip] = func_name
+    self.line_functions = Profiler._find_line_functions(tokenized_program)
+
+    self.line_hits = [0] * len(tokenized_program)
+    self.line_times = [0.0] * len(tokenized_program)
+    self.calls = {}         # function name -> number of calls
+    self.self_times = {}    # function name -> time spent on its own lines
+    self.total_times = {}   # function name -> time spent while it was on the stack
+    self.callers = {}       # function name -> {caller name -> number of calls}
+
+    self.node_parents = [None]     # node -> its parent node
+    self.node_names = [None]       # node -> the function called
+    self.node_functions = [()]     # node -> the distinct functions on its stack
+    self.node_times = [0.0]        # node -> self time spent with exactly this stack
+    self.node_children = {}        # (parent node, function name) -> node
+    self.node = 0                  # the current stack
+
+  # names the function or lambda that each line of the program belongs to (None outside functions)
+  def _find_line_functions(tokenized_program):
+    line_functions = []
+    names = [None]
+    for line_num, tokens in enumerate(tokenized_program):
+      keyword = tokens[0] if tokens else None
+      if keyword == InterpreterBase.FUNC_DEF:
+        names.append(tokens[1])
+      elif keyword == InterpreterBase.LAMBDA_DEF:
+        # the lambda line itself runs in the enclosing function, where it creates the closure
+        line_functions.append(names[-1])
+        names.append(FunctionManager.create_lambda_name(line_num))
+        continue
+      line_functions.append(names[-1])
+      if (keyword == InterpreterBase.ENDFUNC_DEF or keyword == InterpreterBase.ENDLAMBDA_DEF) and len(names) > 1:
+        names.pop()
+    return line_functions
+
+  def function_name(self, func_info):
+    if func_info.start_ip is None:
+      return Profiler.DEFAULT_FUNC_NAME
+    name = self.function_names.get(func_info.start_ip)
+    if name is None:
+      name = FunctionManager.create_lambda_name(func_info.start_ip - 1)   # lambdas start after their lambda line
+    return name
+
+  # node is the stack the line started executing with, before any call or return it made
+  def record_line(self, line_num, elapsed, node):
+    self.line_hits[line_num] += 1
+    self.line_times[line_num] += elapsed
+    name = self.line_functions[line_num]
+    self.self_times[name] = self.self_times.get(name, 0.0) + elapsed
+    self.node_times[node] += elapsed
+    for name in self.node_functions[node]:
+      self.total_times[name] = self.total_times.get(name, 0.0) + elapsed
+
+  def enter(self, func_info):
+    name = self.function_name(func_info)
+    parent = self.node
+    self.calls[name] = self.calls.get(name, 0) + 1
+    caller = self.node_names[parent]
+    if caller is not None:
+      callers = self.callers.setdefault(name, {})
+      callers[caller] = callers.get(caller, 0) + 1
+
+    node = self.node_children.get((parent, name))
+    if node is None:
+      node = self.node_children[(parent, name)] = len(self.node_names)
+      self.node_parents.append(parent)
+      self.node_names.append(name)
+      functions = self.node_functions[parent]
+      self.node_functions.append(functions if name in functions else functions + (name,))
+      self.node_times.append(0.0)
+    self.node = node
+
+  def leave(self):
+    self.node = self.node_parents[self.node]
+
+  # a tail call returns from the current function and calls another in its place
+  def tail_enter(self, func_info):
+    self.leave()
+    self.enter(func_info)
+
+  def finish(self):
+    '''Unwind the stack, e.g. main's call, or everything on it if the program raised an error.'''
+    self.node = 0
+
+  def report(self, sort='total', lines=20):
+    '''Return the profile as text: functions sorted by total, self or calls, then the hottest lines.'''
+    keys = {
+      'total': lambda name: self.total_times.get(name, 0.0),
+      'self': lambda name: self.self_times.get(name, 0.0),
+      'calls': lambda name: self.calls.get(name, 0),
+    }
+    out = [f'{"calls":>10} {"self (s)":>12} {"total (s)":>12}  function']
+    for name in sorted(self._functions(), key=keys[sort], reverse=True):
+      out.append(f'{self.calls.get(name, 0):>10} {self.self_times.get(name, 0.0):>12.6f} '
+                 f'{self.total_times.get(name, 0.0):>12.6f}  {name}')
+    out.append('')
+    out.append(f'{"line":>6} {"hits":>10} {"time (s)":>12}  source')
+    hot_lines = sorted(range(len(self.line_hits)), key=lambda line: self.line_times[line], reverse=True)
+    for line_num in hot_lines[:lines]:
+      if not self.line_hits[line_num]:
+        break
+      out.append(f'{line_num:>6} {self.line_hits[line_num]:>10} {self.line_times[line_num]:>12.6f}  '
+                 f'{self.program[line_num].strip()}')
+    return '\n'.join(out)
+
+  def _functions(self):
+    return set(self.calls) | {name for name in self.self_times if name is not None}
+
+  def collapsed_stacks(self):
+    '''
+    Return the profile in collapsed-stack format (e.g. "main;fib;fib 1234" per line, with the
+    self time of each stack in microseconds), as read by flamegraph.pl, speedscope and inferno.
+    '''
+    out = []
+    for node in range(1, len(self.node_names)):
+      if not self.node_times[node]:
+        continue
+      names = []
+      ancestor = node
+      while ancestor:
+        names.append(self.node_names[ancestor])
+        ancestor = self.node_parents[ancestor]
+      out.append(f'{";".join(reversed(names))} {round(self.node_times[node] * 1e6)}')
+    return ''.join(line + '\n' for line in sorted(out))
+
+  def write_collapsed_stacks(self, path):
+    with open(path, 'w') as f:
+      f.write(self.collapsed_stacks())
+
+  def dump_stats(self, path):
+    '''Write the function profile to path in the format pstats.Stats(path) and snakeviz read.'''
+    # time spent under each caller -> callee edge, counting recursive calls once
+    edge_times = {}
+    subtree_times = list(self.node_times)
+    for node in range(len(self.node_names) - 1, 0, -1):   # children are always created after their parents
+      parent = self.node_parents[node]
+      subtree_times[parent] += subtree_times[node]
+      name = self.node_names[node]
+      if parent and name not in self.node_functions[parent]:
+        edge = (self.node_names[parent], name)
+        edge_times[edge] = edge_times.get(edge, 0.0) + subtree_times[node]
+
+    def key(name):
+      return (self.filename, self.function_line(name), name)
+    stats = {}
+    for name in self._functions():
+      calls = self.calls.get(name, 0)
+      callers = {key(caller): (count, count, 0.0, edge_times.get((caller, name), 0.0))
+                 for caller, count in self.callers.get(name, {}).items()}
+      stats[key(name)] = (calls, calls, self.self_times.get(name, 0.0), self.total_times.get(name, 0.0), callers)
+    with open(path, 'wb') as f:
+      marshal.dump(stats, f)
+
+  # returns the (zero-based, like trace_output) line a function or lambda is defined on
+  def function_line(self, name):
+    for start_ip, func_name in self.function_names.items():
+      if func_name == name:
+        return start_ip - 1
+    if name.startswith(InterpreterBase.LAMBDA_DEF + ':'):
+      return int(name.split(':')[1])
+    return 0
@@ -0,0 +1,218 @@
+from intbase import InterpreterBase
+from objects import Member, split_member
+
+class Resolver:
+  '''
+  Lexical addressing for the SlotEnvironmentManager. Before the program runs, every variable
+  use is resolved to a (depth, slot) address: depth is the index of the block within the
+  function's frame (0 is the function's top block) and slot is the index within that block.
+  Member variables resolve to a Member holding the address of their object and the member
+  name. Names that aren't variables in scope (function names outside of main, typos) resolve
+  to None.
+
+  Every frame's top block starts with the result variables and `this` at fixed slots,
+  followed by the parameters; lambdas also get a slot for each variable they capture. Like the
+  dict-based environment, main's top block also has a variable for every function, holding it.
+  Blocks that declare no variables of their own get no scope at all (see find_scoped_blocks),
+  so they don't count towards depth.
+  '''
+  RESULT_SLOTS = {InterpreterBase.RESULT_DEF + suffix: slot for slot, suffix in enumerate('isbfo')}
+  THIS_SLOT = len(RESULT_SLOTS)
+  FIRST_FREE_SLOT = THIS_SLOT + 1
+
+  def __init__(self, tokenized_program):
+    self.keys = [None] * len(tokenized_program)         # line -> keys for the tokens after the keyword
+    self.block_sizes = [0] * len(tokenized_program)     # if/else/while line -> slots in the block it opens
+    self.frame_sizes = {}  # first line of a function/lambda body -> slots in its top block
+    self.param_keys = {}   # first line of a function/lambda body -> keys of its parameters, in order
+    self.captures = {}     # lambda line -> [(key in enclosing frame, key in lambda frame), ...]
+    self.function_keys = {}  # function name -> key of its variable in main's frame
+    self.scoped_blocks = Resolver.find_scoped_blocks(tokenized_program)
+    self._resolve_program(tokenized_program)
+
+  def find_scoped_blocks(tokenized_program):
+    '''
+    Return the if/else/while lines whose blocks declare variables of their own, so need a scope
+    when they run. Declarations inside lambdas belong to the lambda, not the enclosing block.
+    '''
+    scoped = set()
+    openers = []   # line of the if/else/while that opened each nested block, or None for a function/lambda
+    for line_num, tokens in enumerate(tokenized_program):
+      if not tokens:
+        continue
+      keyword = tokens[0]
+      if keyword == InterpreterBase.FUNC_DEF:
+        openers = [None]
+      elif keyword == InterpreterBase.LAMBDA_DEF:
+        openers.append(None)
+      elif keyword == InterpreterBase.IF_DEF or keyword == InterpreterBase.WHILE_DEF:
+        openers.append(line_num)
+      elif keyword == InterpreterBase.ELSE_DEF and openers:
+        openers[-1] = line_num
+      elif keyword in (InterpreterBase.ENDIF_DEF, InterpreterBase.ENDWHILE_DEF, InterpreterBase.ENDLAMBDA_DEF,
+                       InterpreterBase.ENDFUNC_DEF) and openers:
+        openers.pop()
+      elif keyword == InterpreterBase.VAR_DEF and openers and openers[-1] is not None:
+        scoped.add(openers[-1])
+    return scoped
+
+  def find_loop_depths(tokenized_program, scoped_blocks):
+    '''
+    Return, for each while line, the number of scopes open in its function's frame when it runs
+    (the frame's top block counts as one), so the loop can tell whether its body's scope is open.
+    '''
+    depths = {}
+    depth = 0
+    openers = []   # as in find_scoped_blocks; a lambda's entry is the depth to go back to at its end
+    for line_num, tokens in enumerate(tokenized_program):
+      if not tokens:
+        continue
+      keyword = tokens[0]
+      if keyword == InterpreterBase.FUNC_DEF:
+        depth = 1
+        openers = []
+      elif keyword == InterpreterBase.LAMBDA_DEF:
+        openers.append(depth)
+        depth = 1
+      elif keyword == InterpreterBase.ENDLAMBDA_DEF and openers:
+        depth = openers.pop()
+      elif keyword == InterpreterBase.IF_DEF or keyword == InterpreterBase.WHILE_DEF:
+        if keyword == InterpreterBase.WHILE_DEF:
+          depths[line_num] = depth
+        openers.append(line_num)
+        depth += line_num in scoped_blocks
+      elif keyword == InterpreterBase.ELSE_DEF and openers:
+        depth += (line_num in scoped_blocks) - (openers[-1] in scoped_blocks)
+        openers[-1] = line_num
+      elif (keyword == InterpreterBase.ENDIF_DEF or keyword == InterpreterBase.ENDWHILE_DEF) and openers:
+        depth -= openers.pop() in scoped_blocks
+    return depths
+
+  def result_key(result_var):
+    return (0, Resolver.RESULT_SLOTS[result_var])
+
+  def this_key():
+    return (0, Resolver.THIS_SLOT)
+
+  def _resolve_program(self, tokenized_program):
+    frames = []         # innermost function/lambda being resolved is last
+    block_lines = []    # line of the if/else/while that opened each nested block
+    function_names = [tokens[1] for tokens in tokenized_program
+                      if len(tokens) > 1 and tokens[0] == InterpreterBase.FUNC_DEF]
+
+    for line_num, tokens in enumerate(tokenized_program):
+      if not tokens:
+        continue
+      keyword = tokens[0]
+      if keyword == InterpreterBase.FUNC_DEF:
+        frames = [_FrameScope()]
+        self._declare_params(frames[-1], line_num, tokens[2:-1])
+        if tokens[1] == InterpreterBase.MAIN_FUNC:
+          for name in function_names:
+            self.function_keys[name] = frames[-1].declare(name)
+        continue
+      if not frames:
+        continue   # not inside a function, so never executed
+      frame = frames[-1]
+
+      if keyword == InterpreterBase.LAMBDA_DEF:
+        frames.append(_FrameScope(enclosing=frame))
+        self._declare_params(frames[-1], line_num, tokens[1:-1])
+      elif keyword == InterpreterBase.ENDLAMBDA_DEF or keyword == InterpreterBase.ENDFUNC_DEF:
+        start_line = frame.start_line
+        self.frame_sizes[start_line] = frame.sizes[0]
+        if keyword == InterpreterBase.ENDLAMBDA_DEF:
+          self.captures[start_line - 1] = frame.captures
+        frames.pop()
+      elif keyword == InterpreterBase.VAR_DEF:
+        self.keys[line_num] = [None] + [frame.declare_variable(name) for name in tokens[2:]]
+      elif keyword == InterpreterBase.ELSE_DEF:
+        self.block_sizes[block_lines.pop()] = frame.pop_block()
+        frame.push_block(line_num in self.scoped_blocks)
+        block_lines.append(line_num)
+      elif keyword == InterpreterBase.ENDIF_DEF or keyword == InterpreterBase.ENDWHILE_DEF:
+        self.block_sizes[block_lines.pop()] = frame.pop_block()
+      else:
+        self.keys[line_num] = [self._resolve_token(frame, token) for token in tokens[1:]]
+        if keyword == InterpreterBase.IF_DEF or keyword == InterpreterBase.WHILE_DEF:
+          frame.push_block(line_num in self.scoped_blocks)   # the condition is evaluated outside of the block
+          block_lines.append(line_num)
+
+  def _declare_params(self, frame, line_num, formals):
+    frame.start_line = line_num + 1
+    self.param_keys[line_num + 1] = [frame.declare(formal.split(':')[0]) for formal in formals]
+
+  def _resolve_token(self, frame, token):
+    if not (token[0].isalpha() or token[0] == '_'):
+      return None   # literals and operators
+    if token == InterpreterBase.TRUE_DEF or token == InterpreterBase.FALSE_DEF:
+      return None
+    member = split_member(token)
+    if member is not None:
+      # a lambda captures the object, not a copy of the member, so it sees the member's value
+      # when it runs
+      key = frame.lookup(member[0])
+      return None if key is None else Member(key, member[1])
+    return frame.lookup(token)
+
+class _FrameScope:
+  '''The blocks of one function or lambda while it's being resolved.'''
+  def __init__(self, enclosing=None):
+    self.enclosing = enclosing  # for lambdas, the scope the lambda is created in
+    self.start_line = None
+    self.blocks = [dict(Resolver.RESULT_SLOTS)]  # name -> slot, for each nested block
+    self.sizes = [Resolver.FIRST_FREE_SLOT]
+    self.scoped = []   # for each nested block, whether it has a scope, i.e., is in blocks
+    self.captures = []
+    if enclosing is None:
+      self.blocks[0][InterpreterBase.THIS_DEF] = Resolver.THIS_SLOT
+
+  def declare(self, name):
+    block = self.blocks[-1]
+    if name not in block:
+      block[name] = self.sizes[-1]
+      self.sizes[-1] += 1
+    return (len(self.blocks) - 1, block[name])
+
+  # a var in a lambda's top block that names a variable of the enclosing scope takes the slot it's
+  # captured into, like the dict-based environment, which captures every name the body uses; the
+  # declaration then fails as a redefinition
+  def declare_variable(self, name):
+    if self.enclosing is not None and len(self.blocks) == 1 and name not in self.blocks[0] and \
+       self.enclosing.lookup(name) is not None:
+      return self.lookup(name)
+    return self.declare(name)
+
+  def lookup(self, name):
+    for depth in range(len(self.blocks) - 1, -1, -1):
+      if name in self.blocks[depth]:
+        return (depth, self.blocks[depth][name])
+    if self.enclosing is None:
+      return None
+
+    # a free variable of a lambda: capture it from the enclosing scope into our top block.
+    # `this` always has its own slot, so a lambda created in a method keeps that method's object.
+    enclosing_key = self.enclosing.lookup(name)
+    if name == InterpreterBase.THIS_DEF:
+      self.blocks[0][name] = Resolver.THIS_SLOT
+    elif enclosing_key is None:
+      return None
+    else:
+      self.blocks[0][name] = self.sizes[0]
+      self.sizes[0] += 1
+    if enclosing_key is not None:
+      self.captures.append((enclosing_key, (0, self.blocks[0][name])))
+    return (0, self.blocks[0][name])
+
+  def push_block(self, scoped):
+    self.scoped.append(scoped)
+    if scoped:
+      self.blocks.append({})
+      self.sizes.append(0)
+
+  # returns the number of slots in the block's scope, 0 if it has none
+  def pop_block(self):
+    if not self.scoped.pop():
+      return 0
+    self.blocks.pop()
+    return self.sizes.pop()
@@ -0,0 +1,56 @@
+import io
+import pickle
+import zlib
+from func import FuncInfo
+
+class Snapshot:
+  '''
+  The binary format of Interpreter.snapshot(): a zlib-compressed pickle of the program's source
+  and its execution state. The program is recompiled on restore rather than saved compiled, since
+  Instructions hold bound methods of the Interpreter. Values that refer to a named function share
+  that function's FuncInfo, so they're saved as its name and looked up in the restored program;
+  closures' FuncInfos are saved whole, with their captured variables.
+  '''
+  VERSION = 1  # bump whenever the state saved changes shape
+  DEFAULT_FUNC = '<default func>'  # name the default value of a func variable is saved as
+
+  def dumps(program, lexical_addressing, state, functions):
+    '''Return state as bytes; functions maps the name of every named function to its FuncInfo.'''
+    buffer = io.BytesIO()
+    _StatePickler(buffer, functions).dump(state)
+    return zlib.compress(pickle.dumps((Snapshot.VERSION, lexical_addressing, list(program), buffer.getvalue()),
+                                      pickle.HIGHEST_PROTOCOL))
+
+  def loads(data):
+    '''Return the (lexical_addressing, program, saved state) of a snapshot; see load_state.'''
+    try:
+      version, lexical_addressing, program, state = pickle.loads(zlib.decompress(data))
+    except Exception:
+      raise Exception('Not a snapshot of a brewin program') from None
+    if version != Snapshot.VERSION:
+      raise Exception(f'Snapshot version {version} is not supported')
+    return lexical_addressing, program, state
+
+  def load_state(state, functions):
+    '''Return the state a snapshot saved, with named functions looked up in functions.'''
+    return _StateUnpickler(io.BytesIO(state), functions).load()
+
+class _StatePickler(pickle.Pickler):
+  def __init__(self, file, functions):
+    super().__init__(file, pickle.HIGHEST_PROTOCOL)
+    self.function_names = {id(func_info): name for name, func_info in functions.items()}
+
+  def persistent_id(self, obj):
+    if type(obj) is FuncInfo:
+      return self.function_names.get(id(obj))
+    return None
+
+class _StateUnpickler(pickle.Unpickler):
+  def __init__(self, file, functions):
+    super().__init__(file)
+    self.functions = functions
+
+  def persistent_load(self, name):
+    if name not in self.functions:
+      raise pickle.UnpicklingError(f'Snapshot refers to unknown function {name}')
+    return self.functions[name]
@@ -0,0 +1,22 @@
+import os
+import textwrap
+import interpreterv3 as brewin
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def program(source):
+  '''Split a brewin program written as an indented triple-quoted string into lines.'''
+  return textwrap.dedent(source).strip('\n').split('\n')
+
+def run(source, **options):
+  '''
+  Run a brewin program without echoing its output; return (output lines, (error type, error line)),
+  the error being (None, None) if the program ran to completion.
+  '''
+  interpreter = brewin.Interpreter(console_output=False, **options)
+  try:
+    interpreter.run(program(source))
+  except Exception:
+    if interpreter.error_type is None:
+      raise
+  return interpreter.get_output(), interpreter.get_error_type_and_line()
@@ -0,0 +1,66 @@
+import contextlib
+import io
+import unittest
+from intbase import ErrorType
+from tests.support import run
+
+FOREVER = '''
+  func main void
+    var int i
+    while True
+      assign i + i 1
+    endwhile
+  endfunc
+'''
+
+RECURSE = '''
+  func f n:int void
+    funccall f n
+    funccall print n
+  endfunc
+  func main void
+    funccall f 1
+  endfunc
+'''
+
+class BudgetTest(unittest.TestCase):
+  def test_max_instructions(self):
+    _, error = run(FOREVER, max_instructions=5000)
+    self.assertEqual(error, (ErrorType.RESOURCE_ERROR, 3))
+
+  def test_max_instructions_with_profiling(self):
+    _, error = run(FOREVER, max_instructions=5000, profile=True)
+    self.assertEqual(error, (ErrorType.RESOURCE_ERROR, 3))
+
+  def test_max_instructions_with_tracing(self):
+    trace = io.StringIO()
+    with contextlib.redirect_stdout(trace):
+      _, error = run(FOREVER, max_instructions=5000, trace_output=True)
+    self.assertEqual(error, (ErrorType.RESOURCE_ERROR, 3))
+    self.assertEqual(trace.getvalue().count('\n'), 5000)
+
+  def test_max_call_depth(self):
+    _, error = run(RECURSE, max_call_depth=100)
+    self.assertEqual(error[0], ErrorType.RESOURCE_ERROR)
+
+  def test_max_environment_size(self):
+    for options in ({}, {'profile': True}, {'lexical_addressing': False}):
+      with self.subTest(**options):
+        _, error = run(RECURSE, max_environment_size=500, **options)
+        self.assertEqual(error[0], ErrorType.RESOURCE_ERROR)
+
+  def test_programs_within_budget_run_normally(self):
+    output, error = run('''
+      func main void
+        var int i
+        while < i 10
+          assign i + i 1
+        endwhile
+        funccall print i
+      endfunc
+    ''', max_instructions=1000, max_call_depth=10, max_environment_size=100)
+    self.assertEqual(output, ['10'])
+    self.assertEqual(error, (None, None))
+
+if __name__ == '__main__':
+  unittest.main()
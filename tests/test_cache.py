@@ -0,0 +1,60 @@
+import glob
+import os
+import tempfile
+import unittest
+import interpreterv3 as brewin
+from cache import ProgramCache
+from tests.support import program
+
+HELLO = program('''
+  func main void
+    funccall print "hello"
+  endfunc
+''')
+
+class ProgramCacheTest(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup(self.directory.cleanup)
+
+  def run_cached(self, source):
+    interpreter = brewin.Interpreter(console_output=False, cache_dir=self.directory.name)
+    interpreter.run(source)
+    return interpreter.get_output()
+
+  def entries(self):
+    return glob.glob(os.path.join(self.directory.name, '*.pickle'))
+
+  def test_entries_are_written_and_reused(self):
+    self.assertEqual(self.run_cached(HELLO), ['hello'])
+    entries = self.entries()
+    self.assertEqual(len(entries), 1)
+    modified = os.path.getmtime(entries[0])
+    self.assertEqual(self.run_cached(HELLO), ['hello'])
+    self.assertEqual(os.path.getmtime(entries[0]), modified)
+
+  def test_corrupt_entries_are_rebuilt(self):
+    self.run_cached(HELLO)
+    for contents in (b'', b'garbage', b'\x80\x05'):
+      with self.subTest(contents=contents):
+        with open(self.entries()[0], 'wb') as f:
+          f.write(contents)
+        self.assertEqual(self.run_cached(HELLO), ['hello'])
+        self.assertGreater(os.path.getsize(self.entries()[0]), len(contents))
+
+  def test_trailing_newlines_dont_change_the_digest(self):
+    self.assertEqual(ProgramCache.digest(HELLO), ProgramCache.digest([line + '\n' for line in HELLO]))
+    self.assertNotEqual(ProgramCache.digest(HELLO), ProgramCache.digest(HELLO + ['']))
+
+  def test_syntax_errors_are_not_cached(self):
+    interpreter = brewin.Interpreter(console_output=False, cache_dir=self.directory.name)
+    with self.assertRaises(Exception):
+      interpreter.run(program('''
+        func main void
+          if True
+        endfunc
+      '''))
+    self.assertEqual(self.entries(), [])
+
+if __name__ == '__main__':
+  unittest.main()
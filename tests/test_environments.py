@@ -0,0 +1,196 @@
+import glob
+import os
+import unittest
+import interpreterv3 as brewin
+from intbase import ErrorType
+from tests.support import REPO_DIR, program, run
+
+class LexicalAddressingTest(unittest.TestCase):
+  '''Programs behave the same with lexical addressing and with the dict-based EnvironmentManager.'''
+
+  def assert_same_in_both_modes(self, source):
+    lexical = run(source, lexical_addressing=True)
+    by_name = run(source, lexical_addressing=False)
+    self.assertEqual(lexical, by_name)
+    return lexical
+
+  def test_lambda_redefining_a_captured_variable(self):
+    output, error = self.assert_same_in_both_modes('''
+      func main void
+        var int y
+        assign y 20
+        lambda x:int int
+          var int y
+          assign y 3
+          return + x y
+        endlambda
+        var func f
+        assign f resultf
+        funccall f 20
+        funccall print resulti
+      endfunc
+    ''')
+    self.assertEqual(output, [])
+    self.assertEqual(error[0], ErrorType.NAME_ERROR)
+
+  def test_lambda_shadowing_a_captured_variable_in_a_block(self):
+    output, error = self.assert_same_in_both_modes('''
+      func main void
+        var int y
+        assign y 20
+        lambda x:int int
+          if True
+            var int y
+            assign y + x 3
+            funccall print y
+          endif
+          return + x y
+        endlambda
+        var func f
+        assign f resultf
+        funccall f 1
+        funccall print resulti
+      endfunc
+    ''')
+    self.assertEqual(output, ['4', '21'])
+    self.assertEqual(error, (None, None))
+
+  def test_functions_are_variables_in_main(self):
+    output, error = self.assert_same_in_both_modes('''
+      func f void
+        funccall print "f"
+      endfunc
+      func main void
+        var int f
+        assign f 1
+        funccall print f
+      endfunc
+    ''')
+    self.assertEqual(output, [])
+    self.assertEqual(error, (ErrorType.NAME_ERROR, 4))
+
+  def test_lambda_in_main_redefining_a_function(self):
+    output, error = self.assert_same_in_both_modes('''
+      func f void
+      endfunc
+      func main void
+        lambda int
+          var int f
+          return f
+        endlambda
+        var func g
+        assign g resultf
+        funccall g
+      endfunc
+    ''')
+    self.assertEqual(error[0], ErrorType.NAME_ERROR)
+
+  def test_functions_can_be_redeclared_in_other_functions_and_blocks(self):
+    output, error = self.assert_same_in_both_modes('''
+      func f void
+      endfunc
+      func g void
+        var int f
+        assign f 2
+        funccall print f
+      endfunc
+      func main void
+        var func h
+        assign h f
+        funccall h
+        if True
+          var int f
+          assign f 1
+          funccall print f
+        endif
+        funccall g
+      endfunc
+    ''')
+    self.assertEqual(output, ['1', '2'])
+    self.assertEqual(error, (None, None))
+
+  def test_lambda_reading_a_member_sees_its_current_value(self):
+    output, error = self.assert_same_in_both_modes('''
+      func main void
+        var object o
+        assign o.v 3
+        lambda int
+          return o.v
+        endlambda
+        var func f
+        assign f resultf
+        assign o.v 9
+        funccall f
+        funccall print resulti
+      endfunc
+    ''')
+    self.assertEqual(output, ['9'])
+    self.assertEqual(error, (None, None))
+
+  def test_nested_blocks_and_loops(self):
+    output, error = self.assert_same_in_both_modes('''
+      func main void
+        var int i total
+        while < i 3
+          var int j
+          while < j 2
+            if == j 1
+              var int k
+              assign k + i j
+              assign total + total k
+            endif
+            assign j + j 1
+          endwhile
+          assign i + i 1
+        endwhile
+        funccall print total
+      endfunc
+    ''')
+    self.assertEqual(output, ['6'])
+    self.assertEqual(error, (None, None))
+
+  def test_example_programs(self):
+    paths = sorted(glob.glob(os.path.join(REPO_DIR, 'benchmarks', '*.src'))) + [os.path.join(REPO_DIR, 'test.src')]
+    for path in paths:
+      with self.subTest(program=os.path.basename(path)):
+        with open(path) as f:
+          self.assert_same_in_both_modes(f.read())
+
+class FramePoolTest(unittest.TestCase):
+  SOURCE = '''
+    func down n:int int
+      if == n 0
+        return 0
+      endif
+      var int m
+      assign m - n 1
+      funccall down m
+      return + resulti 1
+    endfunc
+    func main void
+      funccall down 300
+      funccall print resulti
+      funccall down 300
+      funccall print resulti
+    endfunc
+  '''
+
+  def test_high_water_mark_is_the_deepest_stack(self):
+    interpreter = brewin.Interpreter(console_output=False)
+    interpreter.run(program(self.SOURCE))
+    self.assertEqual(interpreter.get_output(), ['300', '300'])
+    self.assertEqual(interpreter.frame_pool.high_water_mark, 302)   # main, then down 300 to 0
+
+  def test_max_free_frames_caps_the_frames_kept(self):
+    interpreter = brewin.Interpreter(console_output=False, max_free_frames=10)
+    interpreter.run(program(self.SOURCE))
+    self.assertEqual(interpreter.get_output(), ['300', '300'])
+    self.assertEqual(interpreter.frame_pool.size(), 10)
+
+  def test_no_pool_without_lexical_addressing(self):
+    interpreter = brewin.Interpreter(console_output=False, lexical_addressing=False)
+    interpreter.run(program(self.SOURCE))
+    self.assertIsNone(interpreter.frame_pool)
+
+if __name__ == '__main__':
+  unittest.main()
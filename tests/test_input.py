@@ -0,0 +1,54 @@
+import io
+import unittest
+import interpreterv3 as brewin
+from intbase import ErrorType
+from tests.support import program
+
+ECHO = program('''
+  func main void
+    var int i
+    while < i 4
+      funccall input
+      funccall print results
+      assign i + i 1
+    endwhile
+  endfunc
+''')
+
+LINES = ['a', 'b', 'c', 'd']
+
+class InputTest(unittest.TestCase):
+  def echo(self, input):
+    interpreter = brewin.Interpreter(console_output=False, input=input)
+    interpreter.run(ECHO)
+    return interpreter.get_output()
+
+  def test_generator_input(self):
+    self.assertEqual(self.echo(line for line in LINES), LINES)
+
+  def test_stream_input_has_its_newlines_stripped(self):
+    self.assertEqual(self.echo(io.StringIO('a\nb\r\nc\nd\n')), LINES)
+
+  def test_reading_past_the_end_gives_none(self):
+    interpreter = brewin.Interpreter(console_output=False, input=iter(['a']))
+    self.assertEqual(interpreter.get_input(), 'a')
+    self.assertIsNone(interpreter.get_input())
+    self.assertIsNone(interpreter.get_input())
+
+  def test_restore_skips_the_lines_already_read(self):
+    stopped = brewin.Interpreter(console_output=False, input=io.StringIO('\n'.join(LINES)), max_instructions=8)
+    with self.assertRaises(Exception):
+      stopped.run(ECHO)
+    self.assertEqual(stopped.error_type, ErrorType.RESOURCE_ERROR)
+    read = stopped.get_output()
+    self.assertTrue(0 < len(read) < len(LINES))
+
+    for input in (io.StringIO('\n'.join(LINES)), (line for line in LINES)):
+      with self.subTest(input=type(input).__name__):
+        restored = brewin.Interpreter(console_output=False, input=input)
+        restored.restore(stopped.snapshot())
+        restored.resume()
+        self.assertEqual(read + restored.get_output(), LINES)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import interpreterv3 as brewin
+from tests.support import program
+
+FIB = '''
+  func fib n:int int
+    if < n 2
+      return n
+    endif
+    var int a m
+    assign m - n 1
+    funccall fib m
+    assign a resulti
+    assign m - n 2
+    funccall fib m
+    return + a resulti
+  endfunc
+  func main void
+    funccall fib 20
+    funccall print resulti
+  endfunc
+'''
+
+class MemoizeTest(unittest.TestCase):
+  def test_pure_calls_are_memoized(self):
+    interpreter = brewin.Interpreter(console_output=False, memoize=True)
+    interpreter.run(program(FIB))
+    self.assertEqual(interpreter.get_output(), ['6765'])
+    self.assertGreater(interpreter.memo.hits, 0)
+    self.assertEqual(interpreter.memo.misses, 21)   # fib 0 to fib 20, once each
+
+  def test_memo_size_bounds_the_cache(self):
+    interpreter = brewin.Interpreter(console_output=False, memoize=True, memo_size=5)
+    interpreter.run(program(FIB))
+    self.assertEqual(interpreter.get_output(), ['6765'])
+    self.assertLessEqual(len(interpreter.memo.results), 5)
+
+  def test_impure_functions_are_not_memoized(self):
+    interpreter = brewin.Interpreter(console_output=False, memoize=True)
+    interpreter.run(program('''
+      func shout n:int void
+        funccall print n
+      endfunc
+      func main void
+        funccall shout 1
+        funccall shout 1
+      endfunc
+    '''))
+    self.assertEqual(interpreter.get_output(), ['1', '1'])
+    self.assertEqual(interpreter.memo.hits, 0)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,74 @@
+import os
+import pstats
+import tempfile
+import unittest
+import interpreterv3 as brewin
+from tests.support import program
+
+FACT = program('''
+  func fact n:int int
+    if <= n 1
+      return 1
+    endif
+    var int m
+    assign m - n 1
+    funccall fact m
+    return * n resulti
+  endfunc
+  func main void
+    funccall fact 5
+    funccall print resulti
+  endfunc
+''')
+
+class ProfilerTest(unittest.TestCase):
+  def setUp(self):
+    interpreter = brewin.Interpreter(console_output=False, profile=True)
+    interpreter.run(FACT)
+    self.assertEqual(interpreter.get_output(), ['120'])
+    self.profiler = interpreter.profiler
+
+  def test_line_hits(self):
+    hits = self.profiler.line_hits
+    self.assertEqual(hits[1], 5)                    # the if, for fact 5 down to fact 1
+    self.assertEqual(hits[2], 1)                    # return 1, for fact 1 only
+    self.assertEqual(hits[4:8], [4, 4, 4, 4])       # the rest of fact, for fact 5 down to fact 2
+    self.assertEqual(hits[10:12], [1, 1])
+    self.assertEqual(hits[0], 0)                    # func lines never run
+
+  def test_function_calls(self):
+    self.assertEqual(self.profiler.calls, {'main': 1, 'fact': 5})
+    self.assertEqual(self.profiler.callers, {'fact': {'main': 1, 'fact': 4}})
+
+  def test_total_time_includes_self_time(self):
+    for name in ('main', 'fact'):
+      with self.subTest(function=name):
+        self.assertGreaterEqual(self.profiler.total_times[name], self.profiler.self_times[name])
+    # main's total includes fact's, which recursion doesn't count twice
+    self.assertGreaterEqual(self.profiler.total_times['main'], self.profiler.total_times['fact'])
+    self.assertAlmostEqual(self.profiler.total_times['fact'], self.profiler.self_times['fact'])
+
+  def test_collapsed_stacks(self):
+    lines = self.profiler.collapsed_stacks().splitlines()
+    self.assertEqual(lines, sorted(lines))
+    self.assertIn('main', [line.split(' ')[0] for line in lines])
+    for line in lines:
+      with self.subTest(line=line):
+        self.assertRegex(line, r'^main(;fact){0,5} \d+$')
+
+  def test_dump_stats_loads_with_pstats(self):
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, 'fact.prof')
+      self.profiler.dump_stats(path)
+      stats = pstats.Stats(path)
+    functions = {name: stat for (_, _, name), stat in stats.stats.items()}
+    self.assertEqual(set(functions), {'main', 'fact'})
+    calls, _, self_time, total_time, callers = functions['fact']
+    self.assertEqual(calls, 5)
+    self.assertAlmostEqual(self_time, self.profiler.self_times['fact'])
+    self.assertAlmostEqual(total_time, self.profiler.total_times['fact'])
+    self.assertEqual({name: stat[0] for (_, _, name), stat in callers.items()}, {'main': 1, 'fact': 4})
+    self.assertEqual(stats.total_calls, 6)
+
+if __name__ == '__main__':
+  unittest.main()
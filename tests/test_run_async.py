@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+import interpreterv3 as brewin
+from intbase import CallbackSink
+from tests.support import program
+
+COUNT = program('''
+  func main void
+    var int i
+    while < i 3
+      assign i + i 1
+      funccall print i
+    endwhile
+  endfunc
+''')
+
+ECHO = program('''
+  func main void
+    funccall input "name?"
+    funccall print "hi " results
+  endfunc
+''')
+
+async def lines(*values):
+  for value in values:
+    yield value
+
+class RunAsyncTest(unittest.TestCase):
+  def test_runs_like_run(self):
+    interpreter = brewin.Interpreter(console_output=False)
+    asyncio.run(interpreter.run_async(COUNT))
+    self.assertEqual(interpreter.get_output(), ['1', '2', '3'])
+
+  def test_programs_share_the_event_loop(self):
+    order = []
+    async def run(name):
+      interpreter = brewin.Interpreter(output_sink=CallbackSink(lambda line: order.append(name)))
+      await interpreter.run_async(COUNT, slice_size=1)
+
+    async def both():
+      await asyncio.gather(run('a'), run('b'))
+    asyncio.run(both())
+    self.assertEqual(sorted(order), ['a'] * 3 + ['b'] * 3)
+    self.assertNotEqual(order, ['a'] * 3 + ['b'] * 3)   # they took turns
+
+  def test_async_iterable_input(self):
+    interpreter = brewin.Interpreter(console_output=False)
+    asyncio.run(interpreter.run_async(ECHO, input=lines('bob')))
+    self.assertEqual(interpreter.get_output(), ['name?', 'hi bob'])
+
+  def test_awaitable_input(self):
+    async def main():
+      queue = asyncio.Queue()
+      await queue.put('ann')
+      interpreter = brewin.Interpreter(console_output=False)
+      await interpreter.run_async(ECHO, input=queue.get)
+      return interpreter.get_output()
+    self.assertEqual(asyncio.run(main()), ['name?', 'hi ann'])
+
+  def test_trace_output_and_profile_are_rejected(self):
+    for options in ({'trace_output': True}, {'profile': True}):
+      with self.subTest(options=options):
+        interpreter = brewin.Interpreter(console_output=False, **options)
+        with self.assertRaises(Exception):
+          asyncio.run(interpreter.run_async(COUNT))
+        self.assertEqual(interpreter.get_output(), [])
+
+if __name__ == '__main__':
+  unittest.main()
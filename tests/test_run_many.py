@@ -0,0 +1,56 @@
+import unittest
+import interpreterv3 as brewin
+from intbase import ErrorType
+from tests.support import program
+
+DOUBLE = program('''
+  func main void
+    funccall input "n?"
+    funccall strtoint results
+    var int n
+    assign n * resulti 2
+    funccall print n
+  endfunc
+''')
+
+class RunManyTest(unittest.TestCase):
+  def run_many(self, source, inputs_list, workers):
+    return brewin.Interpreter(console_output=False).run_many(source, inputs_list, workers=workers)
+
+  def test_one_result_per_input_in_order(self):
+    for workers in (1, 2):
+      with self.subTest(workers=workers):
+        results = self.run_many(DOUBLE, [['1'], ['2'], ['3']], workers)
+        self.assertEqual(results, [(['n?', str(n * 2)], (None, None)) for n in (1, 2, 3)])
+
+  def test_python_exceptions_only_fail_their_own_run(self):
+    for workers in (1, 2):
+      with self.subTest(workers=workers):
+        results = self.run_many(DOUBLE, [['5'], [], ['x'], ['7']], workers)
+        self.assertEqual(results[0], (['n?', '10'], (None, None)))
+        self.assertIsInstance(results[1][1], TypeError)   # strtoint of missing input
+        self.assertIsInstance(results[2][1], ValueError)  # strtoint of non-numeric input
+        self.assertEqual(results[3], (['n?', '14'], (None, None)))
+
+  def test_program_errors_are_results(self):
+    results = self.run_many(program('''
+      func main void
+        funccall input "x?"
+        var int n
+        assign n results
+      endfunc
+    '''), [['a'], ['b']], 1)
+    self.assertEqual(results, [(['x?'], (ErrorType.TYPE_ERROR, 3))] * 2)
+
+  def test_syntax_errors_fail_every_run(self):
+    results = self.run_many(program('''
+      func main void
+        if True
+      endfunc
+    '''), [[], []], 2)
+    self.assertEqual(len(results), 2)
+    self.assertEqual(results[0], results[1])
+    self.assertIsNotNone(results[0][1][0])
+
+if __name__ == '__main__':
+  unittest.main()
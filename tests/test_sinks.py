@@ -0,0 +1,53 @@
+import io
+import unittest
+import interpreterv3 as brewin
+from intbase import CallbackSink, FileSink, LogSink, RingBufferSink, TeeSink
+from tests.support import program
+
+COUNT = program('''
+  func main void
+    var int i
+    while < i 5
+      assign i + i 1
+      funccall print i
+    endwhile
+  endfunc
+''')
+
+class OutputSinkTest(unittest.TestCase):
+  def run_with(self, sink):
+    interpreter = brewin.Interpreter(output_sink=sink)
+    interpreter.run(COUNT)
+    return interpreter
+
+  def test_log_sink_keeps_every_line(self):
+    self.assertEqual(self.run_with(LogSink()).get_output(), ['1', '2', '3', '4', '5'])
+
+  def test_ring_buffer_sink_keeps_the_last_lines(self):
+    self.assertEqual(self.run_with(RingBufferSink(2)).get_output(), ['4', '5'])
+
+  def test_callback_sink_sees_lines_as_printed(self):
+    lines = []
+    interpreter = self.run_with(CallbackSink(lines.append))
+    self.assertEqual(lines, ['1', '2', '3', '4', '5'])
+    self.assertEqual(interpreter.get_output(), [])
+
+  def test_file_sink_writes_batches(self):
+    file = io.StringIO()
+    self.run_with(FileSink(file, flush_every=2))
+    self.assertEqual(file.getvalue(), '1\n2\n3\n4\n5\n')
+
+  def test_tee_sink(self):
+    file = io.StringIO()
+    interpreter = self.run_with(TeeSink(FileSink(file), LogSink()))
+    self.assertEqual(file.getvalue(), '1\n2\n3\n4\n5\n')
+    self.assertEqual(interpreter.get_output(), ['1', '2', '3', '4', '5'])
+
+  def test_reset_clears_the_output(self):
+    interpreter = self.run_with(LogSink())
+    interpreter.reset()
+    interpreter.run(COUNT)
+    self.assertEqual(interpreter.get_output(), ['1', '2', '3', '4', '5'])
+
+if __name__ == '__main__':
+  unittest.main()
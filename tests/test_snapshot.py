@@ -0,0 +1,57 @@
+import unittest
+import interpreterv3 as brewin
+from intbase import ErrorType
+from tests.support import program
+
+COUNT = program('''
+  func show n:int void
+    funccall print n
+  endfunc
+  func main void
+    var int i
+    var func f
+    assign f show
+    while < i 200
+      assign i + i 1
+      funccall f i
+    endwhile
+    funccall input "done?"
+    funccall print results
+  endfunc
+''')
+
+class SnapshotTest(unittest.TestCase):
+  def stopped_run(self, **options):
+    interpreter = brewin.Interpreter(console_output=False, max_instructions=300, **options)
+    with self.assertRaises(Exception):
+      interpreter.run(COUNT)
+    self.assertEqual(interpreter.error_type, ErrorType.RESOURCE_ERROR)
+    return interpreter
+
+  def test_restore_continues_where_the_snapshot_was_taken(self):
+    for lexical_addressing in (True, False):
+      with self.subTest(lexical_addressing=lexical_addressing):
+        stopped = self.stopped_run(lexical_addressing=lexical_addressing)
+        restored = brewin.Interpreter(console_output=False, input=['yes'], lexical_addressing=lexical_addressing)
+        restored.restore(stopped.snapshot())
+        restored.resume()
+        self.assertEqual(stopped.get_output() + restored.get_output(),
+                         [str(n) for n in range(1, 201)] + ['done?', 'yes'])
+
+  def test_resume_after_a_budget_error(self):
+    interpreter = self.stopped_run(input=['ok'])
+    interpreter.max_instructions = None
+    interpreter.resume()
+    self.assertEqual(interpreter.get_output(), [str(n) for n in range(1, 201)] + ['done?', 'ok'])
+
+  def test_restore_needs_the_same_addressing_mode(self):
+    snapshot = self.stopped_run().snapshot()
+    with self.assertRaises(Exception):
+      brewin.Interpreter(console_output=False, lexical_addressing=False).restore(snapshot)
+
+  def test_not_a_snapshot(self):
+    with self.assertRaises(Exception):
+      brewin.Interpreter(console_output=False).restore(b'not a snapshot')
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from intbase import ErrorType
+from tests.support import run
+
+COUNTDOWN = '''
+  func countdown n:int acc:int int
+    if == n 0
+      return acc
+    endif
+    var int m a
+    assign m - n 1
+    assign a + acc 1
+    funccall countdown m a
+    return resulti
+  endfunc
+  func main void
+    funccall countdown 2000 0
+    funccall print resulti
+  endfunc
+'''
+
+FIB = '''
+  func fib n:int int
+    if < n 2
+      return n
+    endif
+    var int a m
+    assign m - n 1
+    funccall fib m
+    assign a resulti
+    assign m - n 2
+    funccall fib m
+    return + a resulti
+  endfunc
+  func main void
+    funccall fib 20
+    funccall print resulti
+  endfunc
+'''
+
+class TailCallTest(unittest.TestCase):
+  def test_tail_calls_dont_nest(self):
+    for lexical_addressing in (True, False):
+      with self.subTest(lexical_addressing=lexical_addressing):
+        output, error = run(COUNTDOWN, max_call_depth=10, lexical_addressing=lexical_addressing)
+        self.assertEqual(output, ['2000'])
+        self.assertEqual(error, (None, None))
+
+  def test_other_calls_nest(self):
+    _, error = run(FIB, max_call_depth=10)
+    self.assertEqual(error[0], ErrorType.RESOURCE_ERROR)
+
+  def test_tail_call_result_checked_against_callers_return_type(self):
+    output, error = run('''
+      func word string
+        return "hi"
+      endfunc
+      func number int
+        funccall word
+      endfunc
+      func main void
+        funccall number
+        funccall print resulti
+      endfunc
+    ''')
+    self.assertEqual(output, ['0'])   # number returns its default, not word's result
+    self.assertEqual(error, (None, None))
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import interpreterv3 as brewin
+from intbase import ErrorType
+from tests.support import program, run
+
+class TypeCheckerTest(unittest.TestCase):
+  def check(self, source):
+    return brewin.Interpreter(console_output=False).check(program(source))
+
+  def test_well_typed_program(self):
+    self.assertEqual(self.check('''
+      func add a:int b:int int
+        return + a b
+      endfunc
+      func main void
+        var int x
+        funccall add 1 2
+        assign x resulti
+        if > x 2
+          funccall print x
+        endif
+      endfunc
+    '''), [])
+
+  def test_finds_every_error_even_on_lines_that_dont_run(self):
+    errors = self.check('''
+      func main void
+        var int x
+        var bool b
+        if False
+          assign x "no"
+        endif
+        assign b + 1 2
+        if x
+        endif
+      endfunc
+    ''')
+    self.assertEqual([line for line, _ in errors], [4, 6, 7])
+
+  def test_mismatched_arguments_and_returns(self):
+    errors = self.check('''
+      func f a:int string
+        return 5
+      endfunc
+      func main void
+        funccall f "s"
+      endfunc
+    ''')
+    self.assertEqual(errors, [(1, 'Non-matching return type'),
+                              (4, 'Mismatched parameter type for a in call to f')])
+
+  def test_accepts_every_type_the_interpreter_does(self):
+    self.assertEqual(self.check('''
+      func main void
+        var void v
+        var int i
+        var string s
+        var bool b
+        var func f
+        var object o
+      endfunc
+    '''), [])
+    self.assertEqual(self.check('''
+      func main void
+        var float x
+      endfunc
+    '''), [(1, 'Invalid type float')])
+
+  def test_messages_match_the_run_time_checks(self):
+    bodies = [
+      ['var int x', 'assign x "s"'],
+      ['var int x', 'assign x + 1 "s"'],
+      ['var bool b', 'assign b ! 3'],
+      ['var string s', 'assign s - "a" "b"'],
+      ['if 5', 'endif'],
+      ['var int x', 'assign x.y 5'],
+    ]
+    for body in bodies:
+      source = '\n'.join(['func main void'] + body + ['endfunc'])
+      with self.subTest(body=body):
+        at_run_time = brewin.Interpreter(console_output=False)
+        checked = brewin.Interpreter(console_output=False, type_check=True)
+        messages = []
+        for interpreter in (at_run_time, checked):
+          with self.assertRaises(Exception) as raised:
+            interpreter.run(program(source))
+          messages.append(str(raised.exception))
+        self.assertEqual(messages[0], messages[1])
+
+  def test_type_check_reports_errors_before_running(self):
+    output, error = run('''
+      func main void
+        funccall print "start"
+        var int x
+        assign x True
+      endfunc
+    ''', type_check=True)
+    self.assertEqual(output, [])
+    self.assertEqual(error, (ErrorType.TYPE_ERROR, 3))
+
+  def test_type_checked_programs_run_the_same(self):
+    source = '''
+      func fact n:int int
+        if <= n 1
+          return 1
+        endif
+        var int m
+        assign m - n 1
+        funccall fact m
+        return * n resulti
+      endfunc
+      func main void
+        var int i
+        while < i 5
+          funccall fact i
+          funccall print resulti
+          assign i + i 1
+        endwhile
+      endfunc
+    '''
+    self.assertEqual(run(source, type_check=True), run(source))
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,247 @@
+from intbase import InterpreterBase
+from objects import split_member
+
+class TypeChecker:
+  '''
+  Checks the types of a whole program before it runs, from the types variables, parameters and
+  functions are declared with. For each line it finds:
+  - errors: (line, description) of every type error found, in line order
+  - operand_types[line]: for each token after the keyword, the type (e.g. int) of the operands of
+    an operator whose operand types are known and valid for it, else None
+  - proven[line]: whether the line's own type check (the assigned value, condition, return value
+    or call arguments) is known to pass
+  The types of objects' members and the signatures of func variables aren't known until the
+  program runs, so checks that involve them are left to run time. Unlike the checks at run time,
+  every line is checked, including lines that never run and the right side of a short-circuited
+  & or |.
+
+  var_types holds the type names variables can be declared with, e.g. int or void.
+  operators maps each binary operator to the types it accepts, e.g. '+' -> {int, string}.
+  runtime_types maps each type name to the interpreter's Type for it, so errors name types the
+  way the same error would be reported when the program runs, e.g. Type.INT rather than int.
+  '''
+  REFERENCE_TYPES = {InterpreterBase.REFINT_DEF: InterpreterBase.INT_DEF,
+                     InterpreterBase.REFSTRING_DEF: InterpreterBase.STRING_DEF,
+                     InterpreterBase.REFBOOL_DEF: InterpreterBase.BOOL_DEF}
+  ARITHMETIC_OPS = {'+', '-', '*', '/', '%'}  # the other binary operators give a bool
+  RESULT_TYPES = {InterpreterBase.RESULT_DEF + suffix: type_name for suffix, type_name in
+                  zip('isbfo', (InterpreterBase.INT_DEF, InterpreterBase.STRING_DEF, InterpreterBase.BOOL_DEF,
+                                InterpreterBase.FUNC_DEF, InterpreterBase.OBJECT_DEF))}
+
+  def __init__(self, tokenized_program, func_manager, var_types, operators, runtime_types):
+    self.func_manager = func_manager
+    self.var_types = var_types
+    self.operators = operators
+    self.runtime_types = runtime_types
+    self.errors = []
+    self.operand_types = [None] * len(tokenized_program)
+    self.proven = [False] * len(tokenized_program)
+    self._check_program(tokenized_program)
+
+  def value_type(type_name):
+    '''The type of the values a variable or parameter declared with type_name holds, e.g. refint -> int.'''
+    return TypeChecker.REFERENCE_TYPES.get(type_name, type_name)
+
+  def _check_program(self, tokenized_program):
+    frames = []   # innermost function/lambda being checked is last
+    for line_num, tokens in enumerate(tokenized_program):
+      if not tokens:
+        continue
+      keyword = tokens[0]
+      if keyword == InterpreterBase.FUNC_DEF:
+        frames = [_TypeScope(tokens[-1])]
+        frames[-1].declare_params(tokens[2:-1])
+        continue
+      if not frames:
+        continue   # not inside a function, so never executed
+      scope = frames[-1]
+
+      if keyword == InterpreterBase.LAMBDA_DEF:
+        frames.append(_TypeScope(tokens[-1], enclosing=scope))
+        frames[-1].declare_params(tokens[1:-1])
+      elif keyword == InterpreterBase.ENDLAMBDA_DEF or keyword == InterpreterBase.ENDFUNC_DEF:
+        frames.pop()
+      elif keyword == InterpreterBase.VAR_DEF:
+        valid = len(tokens) < 3 or tokens[1] in self.var_types
+        if not valid:
+          self._error(line_num, f"Invalid type {tokens[1]}")
+        for name in tokens[2:]:
+          scope.declare(name, tokens[1] if valid else None)
+      elif keyword == InterpreterBase.ELSE_DEF:
+        scope.pop_block()
+        scope.push_block()
+      elif keyword == InterpreterBase.ENDIF_DEF or keyword == InterpreterBase.ENDWHILE_DEF:
+        scope.pop_block()
+      elif keyword == InterpreterBase.ASSIGN_DEF:
+        self._check_assign(line_num, scope, tokens[1:])
+      elif keyword == InterpreterBase.IF_DEF or keyword == InterpreterBase.WHILE_DEF:
+        self._check_condition(line_num, scope, keyword, tokens[1:])
+        scope.push_block()
+      elif keyword == InterpreterBase.RETURN_DEF:
+        self._check_return(line_num, scope, tokens[1:])
+      elif keyword == InterpreterBase.FUNCCALL_DEF:
+        self._check_call(line_num, scope, tokens[1:])
+
+  def _error(self, line_num, description):
+    self.errors.append((line_num, description))
+
+  def _describe(self, type_name):
+    return self.runtime_types.get(type_name, type_name)
+
+  def _check_assign(self, line_num, scope, args):
+    if len(args) < 2:
+      return
+    value_type = self._check_expression(line_num, scope, args, 1)
+    if split_member(args[0]) is not None:
+      self._operand_type(line_num, scope, args[0])   # members take on the type of whatever is assigned
+      return
+    var_type = scope.lookup(args[0])
+    if var_type is None or value_type is None:
+      return
+    if var_type != value_type:
+      self._error(line_num, f"Trying to assign a variable of {self._describe(var_type)} to a value of "
+                            f"{self._describe(value_type)}")
+    else:
+      self.proven[line_num] = True
+
+  def _check_condition(self, line_num, scope, keyword, args):
+    if not args:
+      return
+    value_type = self._check_expression(line_num, scope, args, 0)
+    if value_type is None:
+      return
+    if value_type != InterpreterBase.BOOL_DEF:
+      self._error(line_num, f"Non-boolean {keyword} expression")
+    else:
+      self.proven[line_num] = True
+
+  def _check_return(self, line_num, scope, args):
+    if scope.return_type == InterpreterBase.VOID_DEF:
+      if args:
+        self._error(line_num, "Returning value from void function")
+      return
+    if not args:
+      return
+    value_type = self._check_expression(line_num, scope, args, 0)
+    if value_type is None:
+      return
+    if value_type != TypeChecker.value_type(scope.return_type):
+      self._error(line_num, "Non-matching return type")
+    else:
+      self.proven[line_num] = True
+
+  def _check_call(self, line_num, scope, args):
+    if not args:
+      return
+    func_name = args[0]
+    arg_types = [self._operand_type(line_num, scope, token) for token in args[1:]]
+    if func_name == InterpreterBase.STRTOINT_DEF:
+      if len(arg_types) == 1 and arg_types[0] not in (None, InterpreterBase.STRING_DEF):
+        self._error(line_num, "Non-string passed to strtoint")
+      return
+    if func_name == InterpreterBase.PRINT_DEF or func_name == InterpreterBase.INPUT_DEF:
+      return
+
+    func_info = self.func_manager.get_function_info(func_name)  # function names win over variables in calls
+    if func_info is None:
+      func_type = self._operand_type(line_num, scope, func_name)
+      if func_type is not None and func_type != InterpreterBase.FUNC_DEF:
+        self._error(line_num, f"{func_name} is not of type `func`")
+      return   # the signature of a func variable is only known at run time
+    if len(func_info.params) != len(arg_types):
+      return
+    proven = True
+    for (formal_name, formal_type), arg_type in zip(func_info.params, arg_types):
+      if arg_type is None:
+        proven = False
+      elif arg_type != TypeChecker.value_type(formal_type):
+        self._error(line_num, f"Mismatched parameter type for {formal_name} in call to {func_name}")
+        proven = False
+    self.proven[line_num] = proven
+
+  # types the prefix expression args[start:], noting the operand types of its operators; returns
+  # its type, or None if that isn't known
+  def _check_expression(self, line_num, scope, args, start):
+    operand_types = self.operand_types[line_num]
+    if operand_types is None:
+      operand_types = self.operand_types[line_num] = [None] * len(args)
+    stack = []
+    for i in range(len(args) - 1, start - 1, -1):
+      token = args[i]
+      if token in self.operators:
+        if len(stack) < 2:
+          return None   # a syntax error at run time
+        left = stack.pop()
+        right = stack.pop()
+        stack.append(self._check_binary_op(line_num, operand_types, i, token, left, right))
+      elif token == '!':
+        if not stack:
+          return None
+        operand = stack.pop()
+        if operand == InterpreterBase.BOOL_DEF:
+          operand_types[i] = operand
+        elif operand is not None:
+          self._error(line_num, f"Expecting boolean for ! {self._describe(operand)}")
+        stack.append(InterpreterBase.BOOL_DEF)
+      else:
+        stack.append(self._operand_type(line_num, scope, token))
+    return stack[0] if len(stack) == 1 else None
+
+  def _check_binary_op(self, line_num, operand_types, i, op, left, right):
+    result = None if op in TypeChecker.ARITHMETIC_OPS else InterpreterBase.BOOL_DEF
+    if left is None or right is None:
+      return result or left or right   # if the operation succeeds, both operands have the known type
+    if left != right:
+      self._error(line_num, f"Mismatching types {self._describe(left)} and {self._describe(right)}")
+    elif left not in self.operators[op]:
+      self._error(line_num, f"Operator {op} is not compatible with {self._describe(left)}")
+    else:
+      operand_types[i] = left
+    return result or left
+
+  # returns the type of a literal, variable or function name, or None if it isn't known
+  def _operand_type(self, line_num, scope, token):
+    if token[0] == '"':
+      return InterpreterBase.STRING_DEF
+    if token.isdigit() or (token[0] == '-' and token[1:].isdigit()):
+      return InterpreterBase.INT_DEF
+    if token == InterpreterBase.TRUE_DEF or token == InterpreterBase.FALSE_DEF:
+      return InterpreterBase.BOOL_DEF
+    member = split_member(token)
+    if member is not None:
+      object_type = scope.lookup(member[0])
+      if object_type is not None and object_type != InterpreterBase.OBJECT_DEF:
+        self._error(line_num, f'Dot operator used on a non-object variable `{member[0]}`')
+      return None
+    var_type = scope.lookup(token)
+    if var_type is None and self.func_manager.is_function(token):
+      return InterpreterBase.FUNC_DEF
+    return var_type
+
+class _TypeScope:
+  '''The declared types of the variables in the blocks of one function or lambda while it's being checked.'''
+  def __init__(self, return_type, enclosing=None):
+    self.return_type = return_type
+    self.enclosing = enclosing  # for lambdas, the scope the lambda is created in; it captures from there
+    self.blocks = [dict(TypeChecker.RESULT_TYPES)]
+    self.blocks[0][InterpreterBase.THIS_DEF] = InterpreterBase.OBJECT_DEF
+
+  def declare_params(self, formals):
+    for formal in formals:
+      name, type_name = formal.split(':')
+      self.declare(name, type_name)
+
+  def declare(self, name, type_name):
+    self.blocks[-1][name] = TypeChecker.value_type(type_name) if type_name is not None else None
+
+  def lookup(self, name):
+    for block in reversed(self.blocks):
+      if name in block:
+        return block[name]
+    return self.enclosing.lookup(name) if self.enclosing is not None else None
+
+  def push_block(self):
+    self.blocks.append({})
+
+  def pop_block(self):
+    self.blocks.pop()